@@ -1,43 +1,212 @@
-from django.contrib import admin
+import datetime
 
-from backend.models import Income, Expense, IncomeSource, PaymentMethod, Category
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.exceptions import ValidationError
+
+from backend.budget_utilities.bulk_edit import merge_records, reassign_counterparty, recategorize
+from backend.budget_utilities.pagination import KEYSET_ORDERING, EstimatedCountPaginator
+from backend.budget_utilities.rollup import ROLLUP_COLUMNS
+from backend.budget_utilities.search import search_filter
+from backend.models import (
+    Budget,
+    Income,
+    Expense,
+    IncomeSource,
+    MonthlyCashflow,
+    PaymentMethod,
+    Category,
+    ExchangeRate,
+    RecurringRule,
+)
+
+
+class FullTextSearchMixin:
+    """
+    Answers the changelist search from the full-text index over description and notes,
+    instead of `ILIKE '%term%'` over every search field.
+    """
+
+    search_fields = ("description", "notes")
+    search_help_text = "Search descriptions and notes"
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search_filter(queryset, search_term), False
+
+
+class RollupMonthListFilter(admin.SimpleListFilter):
+    """
+    Month drill-down replacing `date_hierarchy`, whose choices cost a distinct-dates scan of the whole table.
+    The months are read from the small `MonthlyCashflow` rollup instead.
+    """
+
+    title = "month"
+    parameter_name = "month"
+
+    def lookups(self, request, model_admin):
+        _, count_column = ROLLUP_COLUMNS[model_admin.model]
+        months = (
+            MonthlyCashflow.objects.filter(**{f"{count_column}__gt": 0})
+            .order_by("-month")
+            .values_list("month", flat=True)
+            .distinct()
+        )
+        return [(f"{month:%Y-%m}", f"{month:%B %Y}") for month in months]
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            start = datetime.datetime.strptime(self.value(), "%Y-%m").date()
+        except ValueError as error:
+            raise IncorrectLookupParameters(error) from error
+        next_month = start.year * 12 + start.month
+        return queryset.filter(date__gte=start, date__lt=datetime.date(next_month // 12, next_month % 12 + 1, 1))
+
+
+class LargeTableAdminMixin:
+    """
+    Changelist settings for the transaction tables, which may hold millions of rows: counts are estimated, the
+    unfiltered total is not counted at all, and rows are ordered like the `(date, created_at)` index.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = KEYSET_ORDERING
+
+
+class ExpenseActionForm(ActionForm):
+    category = forms.ModelChoiceField(Category.objects.all(), required=False)
+    payment_method = forms.ModelChoiceField(PaymentMethod.objects.all(), required=False)
+
+
+class IncomeActionForm(ActionForm):
+    category = forms.ModelChoiceField(Category.objects.all(), required=False)
+    source = forms.ModelChoiceField(IncomeSource.objects.all(), required=False)
+
+
+class BulkEditAdminMixin:
+    """
+    Changelist actions editing the selected transactions with one set-based UPDATE, instead of a `save()` each.
+    The new category or counterparty is picked in the action bar (`action_form`).
+    """
+
+    actions = ("recategorize_selected", "reassign_counterparty_selected")
+
+    def _action_target(self, request, field_name):
+        try:
+            return self.action_form.base_fields[field_name].clean(request.POST.get(field_name))
+        except ValidationError:
+            return None
+
+    @admin.action(description="Move selected %(verbose_name_plural)s to the chosen category")
+    def recategorize_selected(self, request, queryset):
+        category = self._action_target(request, "category")
+        if category is None:
+            self.message_user(request, "Choose the category to move the transactions to.", messages.ERROR)
+            return
+        moved = recategorize(queryset, category)
+        self.message_user(request, f"Moved {moved} transactions to {category}.", messages.SUCCESS)
+
+    @admin.action(description="Set the chosen payment method or source on selected %(verbose_name_plural)s")
+    def reassign_counterparty_selected(self, request, queryset):
+        field_name = self.model.counterparty_field
+        counterparty = self._action_target(request, field_name)
+        if counterparty is None:
+            label = self.model._meta.get_field(field_name).verbose_name
+            self.message_user(request, f"Choose the {label} to set.", messages.ERROR)
+            return
+        changed = reassign_counterparty(queryset, counterparty)
+        self.message_user(request, f"Set {counterparty} on {changed} transactions.", messages.SUCCESS)
+
+
+class MergeRecordsAdminMixin:
+    actions = ("merge_selected",)
+
+    @admin.action(description="Merge selected %(verbose_name_plural)s into the oldest one")
+    def merge_selected(self, request, queryset):
+        records = list(queryset.order_by("pk"))
+        if len(records) < 2:
+            self.message_user(request, "Select at least two records to merge.", messages.ERROR)
+            return
+        target, duplicates = records[0], records[1:]
+        moved = merge_records(target, duplicates)
+        self.message_user(
+            request, f"Merged {len(duplicates)} records into {target} ({moved} transactions moved).", messages.SUCCESS
+        )
 
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(MergeRecordsAdminMixin, admin.ModelAdmin):
     list_display = ("name", "description")
     search_fields = ("name", "description")
     ordering = ("name",)
 
 
 @admin.register(PaymentMethod)
-class PaymentMethodAdmin(admin.ModelAdmin):
+class PaymentMethodAdmin(MergeRecordsAdminMixin, admin.ModelAdmin):
     list_display = ("name", "description")
     search_fields = ("name", "description")
     ordering = ("name",)
 
 
 @admin.register(IncomeSource)
-class IncomeSourceAdmin(admin.ModelAdmin):
+class IncomeSourceAdmin(MergeRecordsAdminMixin, admin.ModelAdmin):
     list_display = ("name", "description")
     search_fields = ("name", "description")
     ordering = ("name",)
 
 
+@admin.register(Budget)
+class BudgetAdmin(admin.ModelAdmin):
+    list_display = ("category", "period", "limit")
+    list_filter = ("period",)
+    list_select_related = ("category",)
+    ordering = ("category__name", "period")
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ("currency", "month", "rate")
+    list_filter = ("currency",)
+    ordering = ("currency", "-month")
+
+
+@admin.register(RecurringRule)
+class RecurringRuleAdmin(admin.ModelAdmin):
+    list_display = (
+        "description",
+        "transaction_type",
+        "amount",
+        "currency",
+        "frequency",
+        "interval",
+        "materialized_through",
+        "active",
+    )
+    list_filter = ("transaction_type", "frequency", "active")
+    search_fields = ("description",)
+    readonly_fields = ("materialized_through",)
+
+
 @admin.register(Expense)
-class ExpenseAdmin(admin.ModelAdmin):
+class ExpenseAdmin(LargeTableAdminMixin, BulkEditAdminMixin, FullTextSearchMixin, admin.ModelAdmin):
     list_display = (
         "description",
         "amount",
+        "currency",
         "date",
         "category",
         "payment_method",
         # "display_user",
     )  # 'user' if you uncommented it
-    list_filter = ("date", "category", "payment_method")  # 'user'
-    search_fields = ("description", "notes", "category__name", "payment_method__name")  # 'user__username'
-    date_hierarchy = "date"
-    ordering = ("-date",)
+    list_filter = (RollupMonthListFilter, "date", "category", "payment_method")  # 'user'
+    list_select_related = ("category", "payment_method")
+    action_form = ExpenseActionForm
     readonly_fields = ("created_at", "updated_at")
 
     # If you had the user field active:
@@ -59,6 +228,7 @@ class ExpenseAdmin(admin.ModelAdmin):
                 "fields": (
                     "description",
                     "amount",
+                    "currency",
                     "date",
                     "category",
                     "payment_method",
@@ -77,19 +247,19 @@ class ExpenseAdmin(admin.ModelAdmin):
 
 
 @admin.register(Income)
-class IncomeAdmin(admin.ModelAdmin):
+class IncomeAdmin(LargeTableAdminMixin, BulkEditAdminMixin, FullTextSearchMixin, admin.ModelAdmin):
     list_display = (
         "description",
         "amount",
+        "currency",
         "date",
         "category",
         "source",
         # "display_user",
     )  # 'user' if you uncommented it
-    list_filter = ("date", "category", "source")  # 'user'
-    search_fields = ("description", "notes", "category__name", "source__name")  # 'user__username'
-    date_hierarchy = "date"
-    ordering = ("-date",)
+    list_filter = (RollupMonthListFilter, "date", "category", "source")  # 'user'
+    list_select_related = ("category", "source")
+    action_form = IncomeActionForm
     readonly_fields = ("created_at", "updated_at")
 
     # If you had the user field active:
@@ -108,7 +278,15 @@ class IncomeAdmin(admin.ModelAdmin):
         (
             None,
             {
-                "fields": ("description", "amount", "date", "category", "source", "notes")  # Add 'user' here if active
+                "fields": (
+                    "description",
+                    "amount",
+                    "currency",
+                    "date",
+                    "category",
+                    "source",
+                    "notes",
+                )  # Add 'user' here if active
             },
         ),
         (
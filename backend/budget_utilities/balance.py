@@ -0,0 +1,214 @@
+import datetime
+from collections.abc import Iterable, Sequence
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, QuerySet, Value
+
+from backend.models import BalanceSnapshot, Expense, Income, MonthlyCashflow
+from .currency import converted_sum, in_base_currency
+
+# How each transaction type moves the balance.
+BALANCE_SIGNS = {Expense: -1, Income: 1}
+# Tie-breaker between an expense and an income with the same date and creation time: expenses go first.
+_LEDGER_KINDS = {Expense: 0, Income: 1}
+
+_CENTS = Decimal("0.01")
+
+
+def apply_balance_delta(month: datetime.date, amount: Decimal) -> None:
+    """
+    Shift the closing balance of `month` and of every later checkpoint by `amount`, so a backdated change costs one
+    UPDATE instead of a recomputation. Creates the checkpoint of `month` if it is the month's first transaction.
+    """
+    if not amount:
+        return
+    BalanceSnapshot.objects.filter(month__gt=month).update(balance=F("balance") + amount)
+    rows = BalanceSnapshot.objects.filter(month=month)
+    if rows.update(balance=F("balance") + amount):
+        return
+    try:
+        with transaction.atomic():
+            BalanceSnapshot.objects.create(month=month, balance=get_balance_before(month) + amount)
+    except IntegrityError:
+        # Another writer created the checkpoint in the meantime.
+        rows.update(balance=F("balance") + amount)
+
+
+def rebuild_balance_snapshots() -> int:
+    """
+    Recompute every checkpoint from the monthly rollup, converted to the base currency in the same grouped query.
+    Returns the number of checkpoints written.
+    """
+    monthly = (
+        MonthlyCashflow.objects.order_by("month")
+        .values("month")
+        .annotate(
+            income=converted_sum("income_total", date="month", default=Decimal(0)),
+            expense=converted_sum("expense_total", date="month", default=Decimal(0)),
+        )
+    )
+    balance = Decimal(0)
+    snapshots = []
+    for row in monthly:
+        balance += row["income"] - row["expense"]
+        snapshots.append(BalanceSnapshot(month=row["month"], balance=balance))
+
+    with transaction.atomic():
+        BalanceSnapshot.objects.all().delete()
+        BalanceSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+    return len(snapshots)
+
+
+def _checkpoint_before(month: datetime.date) -> QuerySet:
+    return BalanceSnapshot.objects.filter(month__lt=month).order_by("-month").values_list("balance", flat=True)
+
+
+def get_balance_before(month: datetime.date) -> Decimal:
+    """
+    Closing balance of the nearest checkpoint before `month`, i.e. the balance at the start of `month`.
+    """
+    return _checkpoint_before(month).first() or Decimal(0)
+
+
+async def aget_balance_before(month: datetime.date) -> Decimal:
+    return await _checkpoint_before(month).afirst() or Decimal(0)
+
+
+LedgerPosition = tuple[datetime.date, datetime.datetime, int, int]
+
+
+def _ledger_position(row: Expense | Income) -> LedgerPosition:
+    return row.date, row.created_at, _LEDGER_KINDS[type(row)], row.pk
+
+
+def _up_to(kind: int, position: LedgerPosition, inclusive: bool) -> Q:
+    """
+    Rows of `kind` that come before `position` in ledger order `(date, created_at, kind, id)`, or at it if
+    `inclusive`. The kind is fixed per table, so its part of the comparison is resolved here instead of in SQL.
+    """
+    date, created_at, position_kind, pk = position
+    condition = Q(date__lt=date) | Q(date=date, created_at__lt=created_at)
+    if kind < position_kind:
+        condition |= Q(date=date, created_at=created_at)
+    elif kind == position_kind:
+        condition |= Q(date=date, created_at=created_at, **{"id__lte" if inclusive else "id__lt": pk})
+    return Q(date__lte=date) & condition
+
+
+def _ledger_totals_before(position: LedgerPosition) -> QuerySet:
+    """
+    `(kind, total)` of the transactions from the start of `position`'s month up to, not including, `position`, in one
+    query, with the totals converted to the base currency.
+    """
+    month = position[0].replace(day=1)
+    expenses, incomes = (
+        transaction_type.objects.order_by()
+        .filter(_up_to(kind, position, inclusive=False), date__gte=month)
+        .annotate(kind=Value(kind))
+        .values("kind")
+        .annotate(total=converted_sum())
+        .values_list("kind", "total")
+        for transaction_type, kind in _LEDGER_KINDS.items()
+    )
+    return expenses.union(incomes, all=True)
+
+
+def _ledger_entries(first: LedgerPosition, last: LedgerPosition) -> QuerySet:
+    """
+    `(date, created_at, kind, id, amount)` of both transaction tables from `first` to `last` in ledger order, both
+    included, in one query, with the amounts converted to the base currency. Sort the rows to get them in ledger order.
+    """
+    expenses, incomes = (
+        transaction_type.objects.order_by()
+        .filter(~_up_to(kind, first, inclusive=False), _up_to(kind, last, inclusive=True), date__gte=first[0])
+        .annotate(kind=Value(kind), base_amount=in_base_currency())
+        .values_list("date", "created_at", "kind", "id", "base_amount")
+        for transaction_type, kind in _LEDGER_KINDS.items()
+    )
+    return expenses.union(incomes, all=True)
+
+
+def get_balance_at(date: datetime.date) -> Decimal:
+    """
+    Balance after the last transaction on `date`: the nearest checkpoint plus the transactions of that month so far.
+    """
+    month = date.replace(day=1)
+    delta = sum(
+        (transaction_type.objects.filter(date__range=(month, date)).aggregate(total=converted_sum())["total"] or 0)
+        * sign
+        for transaction_type, sign in BALANCE_SIGNS.items()
+    )
+    return get_balance_before(month) + delta
+
+
+def _page_bounds(rows: Sequence[Expense | Income]) -> tuple[LedgerPosition, LedgerPosition]:
+    positions = [_ledger_position(row) for row in rows]
+    return min(positions), max(positions)
+
+
+def _signed_total(totals: Iterable[tuple]) -> Decimal:
+    signs = {kind: BALANCE_SIGNS[transaction_type] for transaction_type, kind in _LEDGER_KINDS.items()}
+    return sum(((total or 0) * signs[kind] for kind, total in totals), Decimal(0))
+
+
+def _set_running_balances(rows: Sequence[Expense | Income], balance: Decimal, entries: Iterable[tuple]) -> None:
+    signs = {kind: BALANCE_SIGNS[transaction_type] for transaction_type, kind in _LEDGER_KINDS.items()}
+    balances = {}
+    for _, _, kind, pk, amount in sorted(entries):
+        # Amounts without an exchange rate are NULL, as they are left out of the checkpoints.
+        balance += signs[kind] * (amount or 0)
+        balances[kind, pk] = balance.quantize(_CENTS)
+    kind = _LEDGER_KINDS[type(rows[0])]
+    for row in rows:
+        row.running_balance = balances.get((kind, row.pk))
+
+
+def attach_running_balances(rows: Sequence[Expense | Income]) -> None:
+    """
+    Set `running_balance` (the balance right after the transaction) on a page of transactions of one type.
+    Costs three queries however deep the page is: the checkpoint before the page's oldest month, one aggregate of
+    that month up to the page's oldest transaction, and the transactions of both types within the page's bounds.
+    """
+    if not rows:
+        return
+    first, last = _page_bounds(rows)
+    balance = get_balance_before(first[0].replace(day=1)) + _signed_total(_ledger_totals_before(first))
+    _set_running_balances(rows, balance, _ledger_entries(first, last))
+
+
+async def aattach_running_balances(rows: Sequence[Expense | Income]) -> None:
+    """
+    Async `attach_running_balances`.
+    """
+    if not rows:
+        return
+    first, last = _page_bounds(rows)
+    balance = await aget_balance_before(first[0].replace(day=1))
+    balance += _signed_total([totals async for totals in _ledger_totals_before(first)])
+    _set_running_balances(rows, balance, [entry async for entry in _ledger_entries(first, last)])
+
+
+def _balance_history(date_from: datetime.date | None, date_to: datetime.date | None) -> QuerySet:
+    snapshots = BalanceSnapshot.objects.order_by("month")
+    if date_from:
+        snapshots = snapshots.filter(month__gte=date_from.replace(day=1))
+    if date_to:
+        snapshots = snapshots.filter(month__lte=date_to)
+    return snapshots.values_list("month", "balance")
+
+
+def get_balance_history(date_from: datetime.date | None = None, date_to: datetime.date | None = None) -> list[dict]:
+    """
+    Month-end balances for a balance-over-time chart, read straight from the checkpoints.
+    """
+    return [{"month": month.isoformat(), "balance": balance} for month, balance in _balance_history(date_from, date_to)]
+
+
+async def aget_balance_history(
+    date_from: datetime.date | None = None, date_to: datetime.date | None = None
+) -> list[dict]:
+    return [
+        {"month": month.isoformat(), "balance": balance}
+        async for month, balance in _balance_history(date_from, date_to)
+    ]
@@ -0,0 +1,105 @@
+import datetime
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db.models import DecimalField, Q, QuerySet, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from backend.models import Budget
+from .currency import converted_sum
+
+PERIOD_MONTHS = {
+    Budget.Period.MONTH: 1,
+    Budget.Period.QUARTER: 3,
+    Budget.Period.YEAR: 12,
+}
+
+
+def period_bounds(period: str, today: datetime.date) -> tuple[datetime.date, datetime.date]:
+    """
+    First day of the calendar period containing `today` and first day of the next one.
+    """
+    months = PERIOD_MONTHS[period]
+    first_month = (today.month - 1) // months * months
+    start = datetime.date(today.year, first_month + 1, 1)
+    next_month = today.year * 12 + first_month + months
+    return start, datetime.date(next_month // 12, next_month % 12 + 1, 1)
+
+
+@dataclass
+class BudgetStatus:
+    budget: Budget
+    period_start: datetime.date
+    period_end: datetime.date
+    spent: Decimal
+
+    @property
+    def remaining(self) -> Decimal:
+        return self.budget.limit - self.spent
+
+    @property
+    def used_percent(self) -> float:
+        return float(self.spent / self.budget.limit * 100) if self.budget.limit else 0.0
+
+    @property
+    def over_budget(self) -> bool:
+        return self.spent > self.budget.limit
+
+    def as_dict(self) -> dict:
+        return {
+            "category": self.budget.category.name,
+            "period": self.budget.period,
+            "period_start": self.period_start.isoformat(),
+            "period_end": self.period_end.isoformat(),
+            "limit": self.budget.limit,
+            "spent": self.spent,
+            "remaining": self.remaining,
+            "used_percent": round(self.used_percent, 1),
+            "over_budget": self.over_budget,
+        }
+
+
+def _budgets_with_spending(bounds: dict[str, tuple[datetime.date, datetime.date]]) -> QuerySet:
+    """
+    Every budget annotated with its category's expenses in its current period, summed from the rollup rows of the
+    period's months and converted to the base currency in one grouped query.
+    """
+    in_period = Q()
+    for period, (start, end) in bounds.items():
+        in_period |= Q(
+            period=period,
+            category__monthly_cashflows__month__gte=start,
+            category__monthly_cashflows__month__lt=end,
+        )
+    return Budget.objects.select_related("category").annotate(
+        spent=Coalesce(
+            converted_sum(
+                "category__monthly_cashflows__expense_total",
+                currency="category__monthly_cashflows__currency",
+                date="category__monthly_cashflows__month",
+                filter=in_period,
+            ),
+            Value(Decimal("0.00")),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+    )
+
+
+def _statuses(budgets, bounds) -> list[BudgetStatus]:
+    return [BudgetStatus(budget, *bounds[budget.period], budget.spent) for budget in budgets]
+
+
+def get_budget_statuses(today: datetime.date | None = None) -> list[BudgetStatus]:
+    """
+    Spent-vs-limit of every budget in its current period.
+    """
+    today = today or timezone.localdate()
+    bounds = {period: period_bounds(period, today) for period in PERIOD_MONTHS}
+    return _statuses(_budgets_with_spending(bounds), bounds)
+
+
+async def aget_budget_statuses(today: datetime.date | None = None) -> list[BudgetStatus]:
+    today = today or timezone.localdate()
+    bounds = {period: period_bounds(period, today) for period in PERIOD_MONTHS}
+    return _statuses([budget async for budget in _budgets_with_spending(bounds)], bounds)
@@ -0,0 +1,115 @@
+from collections import defaultdict
+from collections.abc import Iterable
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Model, QuerySet, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from backend.models import Budget, Category, Expense, Income, IncomeSource, MonthlyCashflow, PaymentMethod
+from .caching import invalidate_dashboard_cache
+from .dedupe import refresh_fingerprints
+from .rollup import ROLLUP_COLUMNS, apply_rollup_delta
+
+COUNTERPARTY_TRANSACTION_TYPES = {PaymentMethod: Expense, IncomeSource: Income}
+
+
+def _move_rollup(queryset: QuerySet, category_id: int | None) -> None:
+    """
+    Move the rollup contributions of the transactions in `queryset` to `category_id`, with one delta per touched
+    month, category and currency computed by a single grouped query. The balance does not change.
+    """
+    groups = (
+        queryset.order_by()
+        .annotate(month=TruncMonth("date"))
+        .values("month", "category_id", "currency")
+        .annotate(total=Sum("amount"), count=Count("id"))
+    )
+    moved: dict = defaultdict(lambda: [Decimal(0), 0])
+    for group in groups:
+        month, currency = group["month"], group["currency"]
+        apply_rollup_delta(queryset.model, month, group["category_id"], currency, -group["total"], -group["count"])
+        moved[month, currency][0] += group["total"]
+        moved[month, currency][1] += group["count"]
+    for (month, currency), (total, count) in moved.items():
+        apply_rollup_delta(queryset.model, month, category_id, currency, total, count)
+
+
+def _recategorize(queryset: QuerySet, category_id: int | None) -> int:
+    queryset = queryset.order_by().exclude(category_id=category_id)
+    _move_rollup(queryset, category_id)
+    return queryset.update(category_id=category_id, updated_at=timezone.now())
+
+
+def _reassign_counterparty(queryset: QuerySet, counterparty_id: int | None) -> int:
+    """
+    The counterparty is part of the content fingerprint, so the fingerprints are cleared by the same UPDATE and
+    recomputed in batches afterwards.
+    """
+    counterparty_column = f"{queryset.model.counterparty_field}_id"
+    queryset = queryset.order_by().exclude(**{counterparty_column: counterparty_id})
+    updated = queryset.update(**{counterparty_column: counterparty_id}, fingerprint=None, updated_at=timezone.now())
+    if updated:
+        refresh_fingerprints(queryset.model)
+    return updated
+
+
+def recategorize(queryset: QuerySet, category: Category | None) -> int:
+    """
+    Move every transaction of `queryset` to `category` with one UPDATE, shifting the rollup by grouped deltas.
+    Returns the number of transactions moved.
+    """
+    with transaction.atomic():
+        moved = _recategorize(queryset, category.pk if category else None)
+        if moved:
+            invalidate_dashboard_cache()
+    return moved
+
+
+def reassign_counterparty(queryset: QuerySet, counterparty: PaymentMethod | IncomeSource | None) -> int:
+    """
+    Set the payment method (expenses) or source (incomes) of every transaction of `queryset` with one UPDATE.
+    Returns the number of transactions changed.
+    """
+    with transaction.atomic():
+        changed = _reassign_counterparty(queryset, counterparty.pk if counterparty else None)
+        if changed:
+            invalidate_dashboard_cache()
+    return changed
+
+
+def merge_records(target: Model, duplicates: Iterable[Model]) -> int:
+    """
+    Fold duplicate categories, payment methods or income sources into `target` and delete them. Their transactions
+    are moved with one UPDATE per transaction table, and a category's budgets follow it unless `target` already has
+    one for the same period. Returns the number of transactions moved.
+    """
+    model = type(target)
+    duplicate_ids = [duplicate.pk for duplicate in duplicates if duplicate.pk != target.pk]
+    if not duplicate_ids:
+        return 0
+    with transaction.atomic():
+        if model is Category:
+            moved = sum(
+                _recategorize(transaction_type.objects.filter(category_id__in=duplicate_ids), target.pk)
+                for transaction_type in ROLLUP_COLUMNS
+            )
+            # Emptied by the move; deleting them keeps the categories' SET_NULL from leaving zero rows behind.
+            MonthlyCashflow.objects.filter(category_id__in=duplicate_ids).delete()
+            periods = set(target.budgets.values_list("period", flat=True))
+            kept = []
+            for budget in Budget.objects.filter(category_id__in=duplicate_ids).order_by("pk"):
+                if budget.period not in periods:
+                    periods.add(budget.period)
+                    kept.append(budget.pk)
+            Budget.objects.filter(pk__in=kept).update(category=target)
+        else:
+            transaction_type = COUNTERPARTY_TRANSACTION_TYPES[model]
+            counterparty_column = f"{transaction_type.counterparty_field}_id"
+            moved = _reassign_counterparty(
+                transaction_type.objects.filter(**{f"{counterparty_column}__in": duplicate_ids}), target.pk
+            )
+        model.objects.filter(pk__in=duplicate_ids).delete()
+        invalidate_dashboard_cache()
+    return moved
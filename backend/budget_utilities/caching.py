@@ -0,0 +1,81 @@
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .budgets import aget_budget_statuses, get_budget_statuses
+from .cashflow import aget_cashflow_summary, get_cashflow_summary
+from .forecasting import build_forecast
+from .freshness import aget_ledger_version, bump_ledger_version, get_ledger_version
+
+DASHBOARD_CACHE_KEY = "backend:dashboard"
+FORECAST_CACHE_KEY = "backend:forecast"
+
+
+def dashboard_cache_key(ledger_version: int, today: datetime.date) -> str:
+    return f"{DASHBOARD_CACHE_KEY}:{ledger_version}:{today:%Y%m%d}"
+
+
+def get_cached_dashboard(ledger_version: int | None = None) -> dict:
+    """
+    Dashboard aggregates, recent transactions and budget statuses, cached under the ledger version and today's date,
+    as the budget periods follow the calendar. Pass the version the page was validated against (views wrapped in
+    `conditional_on_ledger` find it in `request.ledger_version`), which was read from the same database as the
+    dashboard. A write bumps the version in its own transaction, so a request that computed the dashboard from the
+    state before the write can only cache it under the old version, however late it stores it. Likewise a lagging
+    replica reads an older version along with its older data.
+    """
+    if ledger_version is None:
+        ledger_version = get_ledger_version()
+    today = timezone.localdate()
+    key = dashboard_cache_key(ledger_version, today)
+    dashboard = cache.get(key)
+    if dashboard is None:
+        dashboard = {**get_cashflow_summary(), "budgets": get_budget_statuses(today)}
+        cache.set(key, dashboard, settings.DASHBOARD_CACHE_TIMEOUT)
+    return dashboard
+
+
+async def aget_cached_dashboard(ledger_version: int | None = None) -> dict:
+    if ledger_version is None:
+        ledger_version = await aget_ledger_version()
+    today = timezone.localdate()
+    key = dashboard_cache_key(ledger_version, today)
+    dashboard = await cache.aget(key)
+    if dashboard is None:
+        dashboard = {**await aget_cashflow_summary(), "budgets": await aget_budget_statuses(today)}
+        await cache.aset(key, dashboard, settings.DASHBOARD_CACHE_TIMEOUT)
+    return dashboard
+
+
+def invalidate_dashboard_cache() -> None:
+    """
+    Bump the ledger version, which moves the dashboard to a new cache key and validates the pages cached by browsers
+    and proxies. Entries of older versions are left to expire.
+    """
+    bump_ledger_version()
+
+
+def get_cached_forecast() -> dict:
+    """
+    The current month's forecast. It reads the whole rollup, so it is not invalidated on every write and is
+    recomputed at most once per `FORECAST_CACHE_TIMEOUT` instead.
+    """
+    forecast = cache.get(FORECAST_CACHE_KEY)
+    if forecast is None:
+        forecast = build_forecast().as_dict()
+        cache.set(FORECAST_CACHE_KEY, forecast, settings.FORECAST_CACHE_TIMEOUT)
+    return forecast
+
+
+async def aget_cached_forecast() -> dict:
+    """
+    Async `get_cached_forecast`. The forecast itself is NumPy work over a sync ORM read, so it runs in a thread.
+    """
+    forecast = await cache.aget(FORECAST_CACHE_KEY)
+    if forecast is None:
+        forecast = (await sync_to_async(build_forecast)()).as_dict()
+        await cache.aset(FORECAST_CACHE_KEY, forecast, settings.FORECAST_CACHE_TIMEOUT)
+    return forecast
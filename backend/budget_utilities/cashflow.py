@@ -1,16 +1,71 @@
-from typing import TypeAlias
+from decimal import Decimal
 
 from django.db.models import Sum
 from django.db.models.base import Model
 
-from backend.models import Income, Expense
-
-Transaction: TypeAlias = Income | Expense
+from backend.models import Category, Expense, Income
+from .rollup import Transaction, aget_rollup_total, get_rollup_total, rollup_converted_sum
 
 
 def get_most_recent_transactions(transaction_type: type[Transaction], number_of_operations: int = 5) -> list[Model]:
-    return transaction_type.objects.all().order_by("-date")[:number_of_operations]
+    return transaction_type.objects.with_related().order_by("-date")[:number_of_operations]
+
+
+def get_total_of_transaction_type(transaction_type: type[Transaction]) -> Decimal:
+    return get_rollup_total(transaction_type)
+
+
+def get_cashflow_summary() -> dict:
+    """
+    Recent transactions (evaluated, so the result can be cached) and the all-time totals shown on the dashboard.
+    """
+    total_expense = get_total_of_transaction_type(Expense)
+    total_income = get_total_of_transaction_type(Income)
+    return {
+        "recent_expenses": list(get_most_recent_transactions(Expense)),
+        "recent_incomes": list(get_most_recent_transactions(Income)),
+        "total_expense": total_expense,
+        "total_income": total_income,
+        "net_balance": total_income - total_expense,
+    }
+
+
+async def aget_cashflow_summary() -> dict:
+    """
+    Async `get_cashflow_summary`. The queries run one after another: the async ORM hands each of them to the same
+    per-request thread.
+    """
+    total_expense, total_income = await aget_rollup_total(Expense), await aget_rollup_total(Income)
+    return {
+        "recent_expenses": [item async for item in get_most_recent_transactions(Expense)],
+        "recent_incomes": [item async for item in get_most_recent_transactions(Income)],
+        "total_expense": total_expense,
+        "total_income": total_income,
+        "net_balance": total_income - total_expense,
+    }
+
+
+def get_category_totals(category: Category) -> dict[str, Decimal | int]:
+    totals = category.monthly_cashflows.aggregate(
+        total_expense=rollup_converted_sum("expense_total"),
+        expense_count=Sum("expense_count"),
+        total_income=rollup_converted_sum("income_total"),
+        income_count=Sum("income_count"),
+    )
+    return {key: value or 0 for key, value in totals.items()}
 
 
-def get_total_of_transaction_type(transaction_type: type[Transaction]) -> float:
-    return transaction_type.objects.aggregate(total=Sum("amount"))["total"] or 0.0
+def get_category_monthly_breakdown(category: Category, number_of_months: int = 12) -> list[dict]:
+    """
+    The category's latest months with their totals in the base currency, merging the rows of each currency.
+    """
+    return list(
+        category.monthly_cashflows.order_by("-month")
+        .values("month")
+        .annotate(
+            expense_total=rollup_converted_sum("expense_total"),
+            expense_count=Sum("expense_count"),
+            income_total=rollup_converted_sum("income_total"),
+            income_count=Sum("income_count"),
+        )[:number_of_months]
+    )
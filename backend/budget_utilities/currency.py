@@ -0,0 +1,124 @@
+import datetime
+import threading
+import time
+from bisect import bisect_right
+from collections.abc import Iterable
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Case, DecimalField, Expression, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Round
+
+from backend.models import ExchangeRate, MonthlyCashflow
+
+RATE_FIELD = DecimalField(max_digits=18, decimal_places=8)
+# Converted amounts keep the rate's precision until they are summed, so totals are rounded once.
+CONVERTED_FIELD = DecimalField(max_digits=28, decimal_places=10)
+TOTAL_FIELD = DecimalField(max_digits=20, decimal_places=2)
+
+_CENTS = Decimal("0.01")
+
+
+def exchange_rate(currency: str = "currency", date: str = "date") -> Expression:
+    """
+    Rate from the `currency` column of the outer query to the base currency on the `date` column: 1 for the base
+    currency, otherwise the rate of the date's month or the latest earlier one (rates start on the 1st), or else the
+    earliest known one. NULL for a currency without any rate, which leaves its amounts out of converted sums.
+    Rows in the base currency skip the correlated lookups on the `(currency, month)` unique index.
+    """
+    rates = ExchangeRate.objects.filter(currency=OuterRef(currency)).values("rate")
+    return Case(
+        When(**{currency: settings.BASE_CURRENCY}, then=Value(Decimal(1))),
+        default=Coalesce(
+            Subquery(rates.filter(month__lte=OuterRef(date)).order_by("-month")[:1]),
+            Subquery(rates.order_by("month")[:1]),
+        ),
+        output_field=RATE_FIELD,
+    )
+
+
+def in_base_currency(amount: str = "amount", currency: str = "currency", date: str = "date") -> Expression:
+    """
+    The `amount` column converted to the base currency, row by row, inside the database.
+    """
+    return ExpressionWrapper(F(amount) * exchange_rate(currency, date), output_field=CONVERTED_FIELD)
+
+
+def converted_sum(amount: str = "amount", currency: str = "currency", date: str = "date", **extra) -> Expression:
+    """
+    Sum of the `amount` column converted to the base currency, rounded to cents once. Sum rollup rows
+    (`date="month"`) rather than transactions wherever possible: their rates are looked up once per month and
+    currency.
+    """
+    return Round(Sum(in_base_currency(amount, currency, date), **extra), 2, output_field=TOTAL_FIELD)
+
+
+def currencies_without_rates() -> list[str]:
+    """
+    Foreign currencies of recorded amounts that have no exchange rate, and are therefore left out of converted totals.
+    """
+    return list(
+        MonthlyCashflow.objects.exclude(currency=settings.BASE_CURRENCY)
+        .exclude(currency__in=ExchangeRate.objects.values("currency"))
+        .order_by("currency")
+        .values_list("currency", flat=True)
+        .distinct()
+    )
+
+
+class RateTable:
+    """
+    Every exchange rate held in memory, applying the same month rules as `exchange_rate`.
+    """
+
+    def __init__(self, rates: Iterable[tuple[str, datetime.date, Decimal]]):
+        self._months: dict[str, list[datetime.date]] = {}
+        self._rates: dict[str, list[Decimal]] = {}
+        for currency, month, rate in sorted(rates):
+            self._months.setdefault(currency, []).append(month)
+            self._rates.setdefault(currency, []).append(rate)
+
+    @classmethod
+    def load(cls) -> "RateTable":
+        return cls(ExchangeRate.objects.values_list("currency", "month", "rate"))
+
+    def rate(self, currency: str, date: datetime.date) -> Decimal | None:
+        if currency == settings.BASE_CURRENCY:
+            return Decimal(1)
+        months = self._months.get(currency)
+        if not months:
+            return None
+        return self._rates[currency][max(bisect_right(months, date.replace(day=1)) - 1, 0)]
+
+    def convert(self, amount: Decimal, currency: str, date: datetime.date) -> Decimal | None:
+        """
+        `amount` in the base currency, rounded to cents; None when there is no rate for `currency`.
+        """
+        rate = self.rate(currency, date)
+        return None if rate is None else (amount * rate).quantize(_CENTS)
+
+
+class ExchangeRateCache:
+    """
+    Per-process copy of the rate table for converting amounts while rendering. Re-read every
+    `EXCHANGE_RATE_CACHE_TIMEOUT` seconds, and at once after `clear()`. Writes convert with a freshly loaded
+    `RateTable` instead, so stale rates never reach the rollup or the checkpoints.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._table: RateTable | None = None
+        self._loaded_at = 0.0
+
+    def get(self) -> RateTable:
+        with self._lock:
+            if self._table is None or time.monotonic() - self._loaded_at > settings.EXCHANGE_RATE_CACHE_TIMEOUT:
+                self._table, self._loaded_at = RateTable.load(), time.monotonic()
+            return self._table
+
+    def clear(self) -> None:
+        with self._lock:
+            self._table = None
+
+
+rate_cache = ExchangeRateCache()
@@ -0,0 +1,132 @@
+import datetime
+import hashlib
+from collections import Counter
+from collections.abc import Iterable
+from decimal import Decimal
+
+from django.conf import settings
+
+from .rollup import Transaction
+
+# Occurrence slots probed in one query when fingerprinting a single transaction.
+_OCCURRENCE_PROBE = 8
+
+
+def normalize_description(description: str) -> str:
+    return " ".join((description or "").casefold().split())
+
+
+def content_key(
+    date: datetime.date, amount: Decimal, description: str, counterparty_id: int | None, currency: str = ""
+) -> str:
+    """
+    `currency` is only part of the key for foreign-currency amounts, so fingerprints of base-currency transactions
+    stay what they were before amounts had a currency.
+    """
+    parts = (date.isoformat(), f"{Decimal(amount):.2f}", normalize_description(description), str(counterparty_id or ""))
+    if currency and currency != settings.BASE_CURRENCY:
+        parts += (currency,)
+    return "|".join(parts)
+
+
+def compute_fingerprint(key: str, occurrence: int = 0) -> str:
+    """
+    Stable content fingerprint. `occurrence` tells apart genuinely repeated transactions, e.g. two identical coffees
+    on the same day: the n-th copy within a statement always gets the same fingerprint on re-import.
+    """
+    return hashlib.sha256(f"{key}|{occurrence}".encode()).hexdigest()
+
+
+def transaction_content_key(item: Transaction) -> str:
+    model = type(item)
+    return content_key(
+        model._meta.get_field("date").to_python(item.date),
+        model._meta.get_field("amount").to_python(item.amount),
+        item.description,
+        getattr(item, f"{model.counterparty_field}_id"),
+        item.currency,
+    )
+
+
+def assign_fingerprint(item: Transaction) -> None:
+    """
+    Give a single transaction the lowest free fingerprint for its content, with one indexed query.
+    """
+    key = transaction_content_key(item)
+    start = 0
+    while True:
+        candidates = [compute_fingerprint(key, n) for n in range(start, start + _OCCURRENCE_PROBE)]
+        taken = set(
+            type(item)
+            .objects.filter(fingerprint__in=candidates)
+            .exclude(pk=item.pk)
+            .values_list("fingerprint", flat=True)
+        )
+        free = next((fingerprint for fingerprint in candidates if fingerprint not in taken), None)
+        if free is not None:
+            item.fingerprint = free
+            return
+        start += _OCCURRENCE_PROBE
+
+
+class FingerprintIndex:
+    """
+    Duplicate pre-check for bulk ingestion into one transaction table.
+
+    Each batch is checked against the table with a single `fingerprint IN (...)` query, so callers must store the
+    accepted transactions of a batch before passing the next one. Only the occurrence count of each content key is
+    kept in memory, which grows with the distinct transactions seen: use one index per statement, and a fresh one per
+    batch for open-ended streams.
+    """
+
+    def __init__(self, transaction_type: type[Transaction]):
+        self.transaction_type = transaction_type
+        self._occurrences: Counter[str] = Counter()
+
+    def fingerprint(self, item: Transaction) -> str:
+        key = transaction_content_key(item)
+        item.fingerprint = compute_fingerprint(key, self._occurrences[key])
+        self._occurrences[key] += 1
+        return item.fingerprint
+
+    def filter_new(self, batch: Iterable[Transaction]) -> list[Transaction]:
+        """
+        Fingerprint the batch and drop the transactions that are already stored. Fingerprints within one index never
+        repeat, so earlier batches are found in the table rather than in memory.
+        """
+        batch = list(batch)
+        fingerprints = {self.fingerprint(item) for item in batch}
+        existing = set(
+            self.transaction_type.objects.filter(fingerprint__in=fingerprints).values_list("fingerprint", flat=True)
+        )
+        return [item for item in batch if item.fingerprint not in existing]
+
+
+def refresh_fingerprints(transaction_type: type[Transaction], batch_size: int = 1000) -> int:
+    """
+    Fingerprint every row of the table that has none, e.g. after a bulk edit of their content cleared them.
+    Costs one probe query and one `bulk_update` per batch. Returns the number of rows fingerprinted.
+    """
+    unfingerprinted = transaction_type.objects.filter(fingerprint__isnull=True).order_by("pk")
+    assigned: set[str] = set()
+    refreshed = last_pk = 0
+    while batch := list(unfingerprinted.filter(pk__gt=last_pk)[:batch_size]):
+        last_pk = batch[-1].pk
+        keys = [transaction_content_key(item) for item in batch]
+        candidates = {compute_fingerprint(key, n) for key in set(keys) for n in range(_OCCURRENCE_PROBE)}
+        taken = assigned | set(
+            transaction_type.objects.filter(fingerprint__in=candidates).values_list("fingerprint", flat=True)
+        )
+        for item, key in zip(batch, keys):
+            occurrence = 0
+            # Occurrences past the probed ones are rare and checked against the table one at a time.
+            while (fingerprint := compute_fingerprint(key, occurrence)) in taken or (
+                occurrence >= _OCCURRENCE_PROBE and transaction_type.objects.filter(fingerprint=fingerprint).exists()
+            ):
+                occurrence += 1
+            item.fingerprint = fingerprint
+            taken.add(fingerprint)
+            assigned.add(fingerprint)
+        transaction_type.objects.bulk_update(batch, ["fingerprint"])
+        refreshed += len(batch)
+    return refreshed
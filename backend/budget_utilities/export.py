@@ -0,0 +1,72 @@
+import csv
+import json
+from collections.abc import Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from .cashflow import Transaction
+from .search import search_filter
+
+EXPORT_CHUNK_SIZE = 2000
+
+_COMMON_COLUMNS = ("id", "date", "description", "amount", "currency", "category__name")
+_TRAILING_COLUMNS = ("notes", "created_at", "updated_at")
+
+
+def get_export_columns(transaction_type: type[Transaction]) -> tuple[str, ...]:
+    return _COMMON_COLUMNS + (f"{transaction_type.counterparty_field}__name",) + _TRAILING_COLUMNS
+
+
+def filter_transactions(queryset: QuerySet, filters: dict) -> QuerySet:
+    """
+    Apply the cleaned `TransactionFilterForm` data. Filters that do not apply to the model are ignored.
+    """
+    if filters.get("date_from"):
+        queryset = queryset.filter(date__gte=filters["date_from"])
+    if filters.get("date_to"):
+        queryset = queryset.filter(date__lte=filters["date_to"])
+    if filters.get("category"):
+        queryset = queryset.filter(category_id=filters["category"])
+    counterparty_field = queryset.model.counterparty_field
+    if filters.get(counterparty_field):
+        queryset = queryset.filter(**{f"{counterparty_field}_id": filters[counterparty_field]})
+    if filters.get("q"):
+        queryset = search_filter(queryset, filters["q"])
+    return queryset
+
+
+def _iter_export_rows(queryset: QuerySet, columns: tuple[str, ...]) -> Iterator[tuple]:
+    """
+    Stream rows through a server-side cursor, oldest first, without instantiating model objects.
+    """
+    rows = queryset.order_by("date", "created_at", "id").values_list(*columns)
+    return rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class _Echo:
+    """
+    File-like object whose `write` hands the formatted line back, so `csv.writer` can feed a generator.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(queryset: QuerySet, columns: tuple[str, ...]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow([column.replace("__name", "") for column in columns])
+    for row in _iter_export_rows(queryset, columns):
+        yield writer.writerow(row)
+
+
+def iter_jsonl(queryset: QuerySet, columns: tuple[str, ...]) -> Iterator[str]:
+    keys = [column.replace("__name", "") for column in columns]
+    for row in _iter_export_rows(queryset, columns):
+        yield json.dumps(dict(zip(keys, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": (iter_csv, "text/csv"),
+    "jsonl": (iter_jsonl, "application/jsonl"),
+}
@@ -0,0 +1,195 @@
+import calendar
+import datetime
+import itertools
+from dataclasses import dataclass, field
+
+import numpy as np
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from backend.models import Category, Expense, Income, MonthlyCashflow
+from .currency import in_base_currency
+from .rollup import ROLLUP_COLUMNS, Transaction, get_rollup_total
+
+ROLLING_WINDOW = 3
+# Seasonality is only estimated once every calendar month has been seen at least twice.
+SEASONALITY_MIN_MONTHS = 24
+SMOOTHING_LEVEL = 0.5
+SMOOTHING_TREND = 0.3
+# Category ids up to this are bucketed directly instead of being compacted with `np.unique`.
+_DENSE_CATEGORY_LIMIT = 100_000
+
+# Columns of the arrays returned by `load_monthly_totals`.
+MONTH, CATEGORY, AMOUNT = range(3)
+
+
+def load_monthly_totals(transaction_type: type[Transaction]) -> np.ndarray:
+    """
+    Load (absolute month, category id, total) of every `MonthlyCashflow` row holding `transaction_type` amounts as
+    one float64 array. The rollup is already grouped by month, category and currency, so this reads a few rows per
+    month and category however large the ledger is; totals are converted to the base currency at their month's rate
+    and cast to float in the database, and streamed straight into NumPy without building model instances.
+    """
+    total_column, count_column = ROLLUP_COLUMNS[transaction_type]
+    rows = (
+        MonthlyCashflow.objects.filter(**{f"{count_column}__gt": 0})
+        .order_by()
+        .annotate(
+            absolute_month=ExtractYear("month") * 12 + ExtractMonth("month") - 1,
+            category_or_zero=Coalesce(F("category_id"), Value(0)),
+            amount_float=Coalesce(Cast(in_base_currency(total_column, date="month"), FloatField()), Value(0.0)),
+        )
+        .values_list("absolute_month", "category_or_zero", "amount_float")
+    )
+    return np.fromiter(itertools.chain.from_iterable(rows), dtype=np.float64).reshape(-1, 3)
+
+
+def monthly_matrix(data: np.ndarray, first_month: int, months: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sum amounts (one row per currency of a month and category) into a (categories x months) matrix with one
+    `bincount`. Returns the category ids and the matrix.
+    """
+    category_ids = data[:, CATEGORY].astype(np.int64)
+    month_index = data[:, MONTH].astype(np.int64) - first_month
+    if category_ids.max() > _DENSE_CATEGORY_LIMIT:
+        # Sparse ids: compact them first (sorts, so slower than the dense path).
+        present, category_ids = np.unique(category_ids, return_inverse=True)
+    else:
+        present = np.flatnonzero(np.bincount(category_ids))
+    rows = int(category_ids.max()) + 1
+    cells = np.bincount(category_ids * months + month_index, weights=data[:, AMOUNT], minlength=rows * months)
+    matrix = cells.reshape(rows, months)
+    return present, matrix if rows == len(present) else matrix[present]
+
+
+def rolling_mean(matrix: np.ndarray, window: int = ROLLING_WINDOW) -> np.ndarray:
+    """
+    Mean of the last `window` columns of every row (fewer if the history is shorter).
+    """
+    if matrix.shape[1] == 0:
+        return np.zeros(matrix.shape[0])
+    return matrix[:, -window:].mean(axis=1)
+
+
+def seasonal_indices(matrix: np.ndarray, first_month: int) -> np.ndarray:
+    """
+    Per-row ratio of each calendar month's mean to the overall mean, shape (rows, 12). Ones if history is too short.
+    """
+    rows, months = matrix.shape
+    if months < SEASONALITY_MIN_MONTHS:
+        return np.ones((rows, 12))
+    calendar_months = (first_month + np.arange(months)) % 12
+    one_hot = np.eye(12)[calendar_months]
+    monthly_means = (matrix @ one_hot) / one_hot.sum(axis=0)
+    overall_means = matrix.mean(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        indices = np.where(overall_means > 0, monthly_means / overall_means, 1.0)
+    return indices
+
+
+def holt_forecast(matrix: np.ndarray, alpha: float = SMOOTHING_LEVEL, beta: float = SMOOTHING_TREND) -> np.ndarray:
+    """
+    One-step-ahead Holt (linear exponential smoothing) forecast of every row at once. Only the time axis is looped.
+    """
+    if matrix.shape[1] == 0:
+        return np.zeros(matrix.shape[0])
+    level, trend = matrix[:, 0].copy(), np.zeros(matrix.shape[0])
+    for column in matrix.T[1:]:
+        previous_level = level
+        level = alpha * column + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+    return np.maximum(level + trend, 0)
+
+
+@dataclass
+class SeriesForecast:
+    month_to_date: np.ndarray
+    run_rate: np.ndarray
+    rolling_mean: np.ndarray
+    forecast: np.ndarray
+
+    @property
+    def remaining(self) -> np.ndarray:
+        """
+        What is still expected to come in this month on top of what already has.
+        """
+        return np.maximum(self.forecast - self.month_to_date, 0)
+
+
+def forecast_series(data: np.ndarray, today: datetime.date) -> tuple[np.ndarray, SeriesForecast]:
+    """
+    Forecast the current month's total per category from the completed months before it and the month to date.
+    """
+    current_month = today.year * 12 + today.month - 1
+    data = data[data[:, MONTH] <= current_month]
+    if not len(data):
+        empty = np.zeros(0)
+        return empty.astype(np.int64), SeriesForecast(empty, empty, empty, empty)
+
+    first_month = int(data[:, MONTH].min())
+    category_ids, matrix = monthly_matrix(data, first_month, current_month - first_month + 1)
+    history, month_to_date = matrix[:, :-1], matrix[:, -1]
+
+    days_in_month = calendar.monthrange(today.year, today.month)[1]
+    run_rate = month_to_date / today.day * days_in_month
+    # Deseasonalize every completed month by its own calendar month's index, smooth, then reseasonalize with the
+    # current month's index.
+    indices = seasonal_indices(history, first_month)
+    history_indices = indices[:, (first_month + np.arange(history.shape[1])) % 12]
+    deseasonalized = history / np.where(history_indices > 0, history_indices, 1)
+    smoothed = holt_forecast(deseasonalized) * indices[:, today.month - 1]
+    # Without any completed month there is nothing to smooth, so fall back to the run rate.
+    forecast = smoothed if history.shape[1] else run_rate
+    return category_ids, SeriesForecast(month_to_date, run_rate, rolling_mean(history), forecast)
+
+
+@dataclass
+class BudgetForecast:
+    month: datetime.date
+    net_balance: float
+    projected_month_end_balance: float
+    expected_expense: float
+    expected_income: float
+    categories: list[dict] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            "month": self.month.isoformat(),
+            "net_balance": round(self.net_balance, 2),
+            "projected_month_end_balance": round(self.projected_month_end_balance, 2),
+            "expected_expense": round(self.expected_expense, 2),
+            "expected_income": round(self.expected_income, 2),
+            "categories": self.categories,
+        }
+
+
+def build_forecast(today: datetime.date | None = None) -> BudgetForecast:
+    """
+    Projected month-end balance and per-category expense run-rates and forecasts for the current month.
+    """
+    today = today or timezone.localdate()
+    expense_ids, expenses = forecast_series(load_monthly_totals(Expense), today)
+    _, incomes = forecast_series(load_monthly_totals(Income), today)
+
+    net_balance = float(get_rollup_total(Income) - get_rollup_total(Expense))
+    names = dict(Category.objects.filter(pk__in=expense_ids.tolist()).values_list("pk", "name"))
+    categories = [
+        {
+            "category": names.get(category_id, "Uncategorized"),
+            "month_to_date": round(float(expenses.month_to_date[row]), 2),
+            "run_rate": round(float(expenses.run_rate[row]), 2),
+            "rolling_mean": round(float(expenses.rolling_mean[row]), 2),
+            "forecast": round(float(expenses.forecast[row]), 2),
+        }
+        for row, category_id in enumerate(expense_ids.tolist())
+    ]
+    categories.sort(key=lambda category: category["forecast"], reverse=True)
+    return BudgetForecast(
+        month=today.replace(day=1),
+        net_balance=net_balance,
+        projected_month_end_balance=net_balance + float(incomes.remaining.sum() - expenses.remaining.sum()),
+        expected_expense=float(np.maximum(expenses.forecast, expenses.month_to_date).sum()),
+        expected_income=float(np.maximum(incomes.forecast, incomes.month_to_date).sum()),
+        categories=categories,
+    )
@@ -0,0 +1,103 @@
+import functools
+
+from asgiref.sync import iscoroutinefunction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from backend.models import LedgerState
+
+LEDGER_STATE_PK = 1
+
+_CONDITIONAL_METHODS = ("GET", "HEAD")
+
+
+def bump_ledger_version() -> None:
+    """
+    Mark the ledger as changed. Runs inside the writing transaction, so the new version becomes visible together
+    with the change itself, on the primary and on the replicas alike.
+    """
+    now = timezone.now()
+    updated = LedgerState.objects.filter(pk=LEDGER_STATE_PK).update(version=F("version") + 1, updated_at=now)
+    if not updated:
+        LedgerState.objects.get_or_create(pk=LEDGER_STATE_PK, defaults={"version": 1, "updated_at": now})
+
+
+def _ledger_state_query():
+    return LedgerState.objects.filter(pk=LEDGER_STATE_PK).values_list("version", flat=True)
+
+
+def get_ledger_version() -> int:
+    return _ledger_state_query().first() or 0
+
+
+async def aget_ledger_version() -> int:
+    return await _ledger_state_query().afirst() or 0
+
+
+def _etag(version: int, per_day: bool) -> str:
+    """
+    The ETag of a page rendered from ledger `version`. Pages that also depend on the current date (`per_day`) change
+    at midnight as well. There is deliberately no Last-Modified: its whole-second resolution would answer a request
+    made in the same second as a later write with a stale 304.
+    """
+    etag = f"ledger-{version}"
+    if per_day:
+        etag += f"-{timezone.localdate():%Y%m%d}"
+    return quote_etag(etag)
+
+
+def _set_etag(response, etag: str):
+    if response.status_code == 200:
+        response.headers.setdefault("ETag", etag)
+    return response
+
+
+def conditional_on_ledger(view=None, *, per_day: bool = False):
+    """
+    Answer GET/HEAD requests whose `If-None-Match` matches the current ledger version with `304 Not Modified`,
+    without running the view, and otherwise leave the version in `request.ledger_version` for the view to key its
+    caches with. Works on sync and async views; apply it inside `replica_reads`, which pins the request to one
+    database, so the version is read from the same database as the page.
+    """
+    if view is None:
+        return functools.partial(conditional_on_ledger, per_day=per_day)
+
+    if iscoroutinefunction(view):
+
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method not in _CONDITIONAL_METHODS:
+                return await view(request, *args, **kwargs)
+            request.ledger_version = await aget_ledger_version()
+            etag = _etag(request.ledger_version, per_day)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = _set_etag(await view(request, *args, **kwargs), etag)
+            return response
+
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in _CONDITIONAL_METHODS:
+            return view(request, *args, **kwargs)
+        request.ledger_version = get_ledger_version()
+        etag = _etag(request.ledger_version, per_day)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = _set_etag(view(request, *args, **kwargs), etag)
+        return response
+
+    return wrapper
+
+
+class ConditionalOnLedgerMixin:
+    """
+    Class-based view counterpart of `conditional_on_ledger`. List it after `ReplicaReadsMixin`.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return conditional_on_ledger(super().as_view(**initkwargs))
@@ -0,0 +1,323 @@
+import csv
+import datetime
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import TextIO
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField
+
+from backend.models import Category, ExchangeRate, Expense, Income, IncomeSource, PaymentMethod
+from .balance import rebuild_balance_snapshots
+from .caching import invalidate_dashboard_cache
+from .currency import rate_cache
+from .dedupe import FingerprintIndex
+from .rollup import Transaction, add_transactions_to_rollup
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_DATE_FORMAT = "%Y-%m-%d"
+
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+_CURRENCY_CODE = re.compile(r"[A-Z]{3}")
+
+
+class StatementError(ValueError):
+    """
+    A statement line that cannot be turned into a transaction.
+    """
+
+    line_number = 0
+
+
+class ExchangeRateError(ValueError):
+    """
+    An exchange-rate file that cannot be loaded. Nothing is written.
+    """
+
+
+@dataclass
+class StatementRow:
+    line_number: int
+    date: datetime.date
+    description: str
+    amount: Decimal
+    transaction_type: type[Transaction]
+    category: str = ""
+    counterparty: str = ""
+    notes: str = ""
+    currency: str = ""
+
+
+@dataclass
+class ImportReport:
+    expenses_created: int = 0
+    incomes_created: int = 0
+    duplicates_skipped: int = 0
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def created(self) -> int:
+        return self.expenses_created + self.incomes_created
+
+
+def _parse_decimal(value: str, model_field: DecimalField) -> Decimal:
+    """
+    A finite number rounded to the decimal places of `model_field` and within its digits, so a bad value rejects its
+    own row instead of failing the whole batch in `bulk_create` or the database.
+    """
+    try:
+        number = Decimal(value.strip().replace(",", ""))
+        if not number.is_finite():
+            raise InvalidOperation
+        number = number.quantize(Decimal(1).scaleb(-model_field.decimal_places))
+    except InvalidOperation as error:
+        raise StatementError(f"Invalid {model_field.name}: {value!r}") from error
+    if abs(number) >= Decimal(10) ** (model_field.max_digits - model_field.decimal_places):
+        raise StatementError(f"{model_field.name.capitalize()} out of range: {value!r}")
+    return number
+
+
+def _parse_amount(value: str) -> Decimal:
+    return _parse_decimal(value, Expense._meta.get_field("amount"))
+
+
+def _parse_currency(value: str) -> str:
+    currency = value.strip().upper()
+    if currency and not _CURRENCY_CODE.fullmatch(currency):
+        raise StatementError(f"Invalid currency: {value!r}")
+    return currency
+
+
+def _parse_date(value: str, date_format: str) -> datetime.date:
+    try:
+        return datetime.datetime.strptime(value.strip(), date_format).date()
+    except ValueError as error:
+        raise StatementError(f"Invalid date: {value!r}") from error
+
+
+def _transaction_type_for(amount: Decimal, kind: str) -> type[Transaction]:
+    """
+    An explicit `type` column wins; otherwise debits (negative amounts) are expenses and credits are incomes.
+    """
+    kind = kind.strip().lower()
+    if kind in ("expense", "debit"):
+        return Expense
+    if kind in ("income", "credit"):
+        return Income
+    if kind:
+        raise StatementError(f"Unknown transaction type: {kind!r}")
+    return Expense if amount < 0 else Income
+
+
+def parse_csv(lines: Iterable[str], date_format: str = DEFAULT_DATE_FORMAT) -> Iterator[StatementRow | StatementError]:
+    """
+    Parse a CSV statement with a `date,description,amount` header and optional `type`, `category`,
+    `payment_method`, `source`, `notes` and `currency` columns. Yields one row or one error per line.
+    """
+    reader = csv.DictReader(lines)
+    missing = {"date", "description", "amount"} - set(reader.fieldnames or ())
+    if missing:
+        yield StatementError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+        return
+
+    for record in reader:
+        try:
+            amount = _parse_amount(record["amount"] or "")
+            transaction_type = _transaction_type_for(amount, record.get("type") or "")
+            yield StatementRow(
+                line_number=reader.line_num,
+                date=_parse_date(record["date"] or "", date_format),
+                description=(record["description"] or "").strip(),
+                amount=abs(amount),
+                transaction_type=transaction_type,
+                category=(record.get("category") or "").strip(),
+                counterparty=(record.get(transaction_type.counterparty_field) or "").strip(),
+                notes=(record.get("notes") or "").strip(),
+                currency=_parse_currency(record.get("currency") or ""),
+            )
+        except StatementError as error:
+            error.line_number = reader.line_num
+            yield error
+
+
+def parse_ofx(lines: Iterable[str]) -> Iterator[StatementRow | StatementError]:
+    """
+    Parse the `<STMTTRN>` blocks of an OFX/QFX statement line by line, accepting both SGML and XML flavours.
+    Amounts are in the statement's `<CURDEF>` currency.
+    """
+    block: dict[str, str] | None = None
+    start_line = 0
+    currency = ""
+    for line_number, line in enumerate(lines, start=1):
+        upper = line.upper()
+        if "<STMTTRN>" in upper:
+            block, start_line = {}, line_number
+        for tag, value in _OFX_FIELD.findall(line):
+            if not value.strip():
+                continue
+            if block is not None:
+                block[tag.upper()] = value.strip()
+            elif tag.upper() == "CURDEF":
+                currency = value.strip().upper()
+        if "</STMTTRN>" in upper and block is not None:
+            try:
+                amount = _parse_amount(block.get("TRNAMT", ""))
+                yield StatementRow(
+                    line_number=start_line,
+                    date=_parse_date(block.get("DTPOSTED", "")[:8], "%Y%m%d"),
+                    description=block.get("NAME") or block.get("MEMO", ""),
+                    amount=abs(amount),
+                    transaction_type=_transaction_type_for(amount, ""),
+                    notes=block.get("MEMO", "") if "NAME" in block else "",
+                    currency=_parse_currency(currency),
+                )
+            except StatementError as error:
+                error.line_number = start_line
+                yield error
+            block = None
+
+
+class NameLookup:
+    """
+    Case-insensitive name -> pk table for a lookup model, loaded with a single query.
+    """
+
+    def __init__(self, model, create_missing: bool = False):
+        self.model = model
+        self.create_missing = create_missing
+        self._pks = {name.casefold(): pk for pk, name in model.objects.values_list("pk", "name")}
+
+    def resolve(self, name: str) -> int | None:
+        if not name:
+            return None
+        key = name.casefold()
+        if key not in self._pks:
+            if not self.create_missing:
+                raise StatementError(f"Unknown {self.model._meta.verbose_name}: {name!r}")
+            self._pks[key] = self.model.objects.create(name=name).pk
+        return self._pks[key]
+
+
+class StatementImporter:
+    """
+    Writes parsed statement rows with `bulk_create` in batches, inside one database transaction.
+    Rows already present in the ledger (same fingerprint) are skipped, so overlapping statements can be re-imported.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, create_missing: bool = False):
+        self.batch_size = batch_size
+        self.categories = NameLookup(Category, create_missing)
+        self.counterparties = {
+            Expense: NameLookup(PaymentMethod, create_missing),
+            Income: NameLookup(IncomeSource, create_missing),
+        }
+        self.fingerprints = {Expense: FingerprintIndex(Expense), Income: FingerprintIndex(Income)}
+        self.pending: dict[type[Transaction], list[Transaction]] = {Expense: [], Income: []}
+        self.report = ImportReport()
+
+    def build(self, row: StatementRow) -> Transaction:
+        transaction_type = row.transaction_type
+        counterparty_id = self.counterparties[transaction_type].resolve(row.counterparty)
+        return transaction_type(
+            description=row.description[: transaction_type._meta.get_field("description").max_length],
+            amount=row.amount,
+            date=row.date,
+            category_id=self.categories.resolve(row.category),
+            notes=row.notes or None,
+            currency=row.currency or settings.BASE_CURRENCY,
+            **{f"{transaction_type.counterparty_field}_id": counterparty_id},
+        )
+
+    def flush(self, transaction_type: type[Transaction]) -> None:
+        pending = self.pending[transaction_type]
+        if not pending:
+            return
+        batch = self.fingerprints[transaction_type].filter_new(pending)
+        self.report.duplicates_skipped += len(pending) - len(batch)
+        transaction_type.objects.bulk_create(batch, batch_size=self.batch_size)
+        add_transactions_to_rollup(transaction_type, batch)
+        if transaction_type is Expense:
+            self.report.expenses_created += len(batch)
+        else:
+            self.report.incomes_created += len(batch)
+        self.pending[transaction_type] = []
+
+    def run(self, rows: Iterable[StatementRow | StatementError]) -> ImportReport:
+        with transaction.atomic():
+            for row in rows:
+                if isinstance(row, StatementError):
+                    self.report.errors.append((row.line_number, str(row)))
+                    continue
+                try:
+                    item = self.build(row)
+                except StatementError as error:
+                    self.report.errors.append((row.line_number, str(error)))
+                    continue
+                self.pending[row.transaction_type].append(item)
+                if len(self.pending[row.transaction_type]) >= self.batch_size:
+                    self.flush(row.transaction_type)
+            for transaction_type in self.pending:
+                self.flush(transaction_type)
+            if self.report.created:
+                invalidate_dashboard_cache()
+        return self.report
+
+
+def detect_statement_format(filename: str) -> str:
+    return "ofx" if filename.lower().endswith((".ofx", ".qfx")) else "csv"
+
+
+def import_statement(
+    stream: TextIO,
+    statement_format: str = "csv",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    create_missing: bool = False,
+    date_format: str = DEFAULT_DATE_FORMAT,
+) -> ImportReport:
+    rows = parse_ofx(stream) if statement_format == "ofx" else parse_csv(stream, date_format)
+    return StatementImporter(batch_size=batch_size, create_missing=create_missing).run(rows)
+
+
+def parse_exchange_rates(lines: Iterable[str], date_format: str = DEFAULT_DATE_FORMAT) -> list[ExchangeRate]:
+    """
+    Parse a CSV file with a `currency,date,rate` header, the rate being the value of one unit of `currency` in the
+    base currency. Each rate applies from the first day of its date's month; a later line for the same month wins.
+    """
+    reader = csv.DictReader(lines)
+    missing = {"currency", "date", "rate"} - set(reader.fieldnames or ())
+    if missing:
+        raise ExchangeRateError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+
+    rates: dict[tuple[str, datetime.date], ExchangeRate] = {}
+    for record in reader:
+        try:
+            currency = _parse_currency(record["currency"] or "")
+            month = _parse_date(record["date"] or "", date_format).replace(day=1)
+            rate = _parse_decimal(record["rate"] or "", ExchangeRate._meta.get_field("rate"))
+        except StatementError as error:
+            raise ExchangeRateError(f"Line {reader.line_num}: {error}") from error
+        if not currency or currency == settings.BASE_CURRENCY:
+            raise ExchangeRateError(f"Line {reader.line_num}: a foreign currency code is required")
+        if rate <= 0:
+            raise ExchangeRateError(f"Line {reader.line_num}: the rate must be positive")
+        rates[currency, month] = ExchangeRate(currency=currency, month=month, rate=rate)
+    return list(rates.values())
+
+
+def load_exchange_rates(stream: TextIO, date_format: str = DEFAULT_DATE_FORMAT) -> int:
+    """
+    Insert or replace the rates of a CSV file (see `parse_exchange_rates`) with one upsert, then recompute the
+    balance checkpoints at the new rates. Returns the number of rates written.
+    """
+    rates = parse_exchange_rates(stream, date_format)
+    with transaction.atomic():
+        ExchangeRate.objects.bulk_create(
+            rates, update_conflicts=True, unique_fields=["currency", "month"], update_fields=["rate"]
+        )
+        rebuild_balance_snapshots()
+        invalidate_dashboard_cache()
+        transaction.on_commit(rate_cache.clear)
+    return len(rates)
@@ -0,0 +1,144 @@
+import calendar
+import datetime
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from backend.models import Expense, Income, RecurringRule
+from .caching import invalidate_dashboard_cache
+from .dedupe import FingerprintIndex
+from .rollup import Transaction, add_transactions_to_rollup
+
+DEFAULT_RULE_BATCH_SIZE = 500
+DEFAULT_INSERT_BATCH_SIZE = 5000
+
+TRANSACTION_TYPES = {
+    RecurringRule.TransactionType.EXPENSE: Expense,
+    RecurringRule.TransactionType.INCOME: Income,
+}
+
+_DAYS_PER_STEP = {RecurringRule.Frequency.DAILY: 1, RecurringRule.Frequency.WEEKLY: 7}
+_MONTHS_PER_STEP = {RecurringRule.Frequency.MONTHLY: 1, RecurringRule.Frequency.YEARLY: 12}
+
+
+def nth_occurrence(rule: RecurringRule, n: int) -> datetime.date:
+    """
+    Date of the `n`-th occurrence (0-based), computed directly rather than by stepping through the earlier ones.
+    """
+    if rule.frequency in _DAYS_PER_STEP:
+        return rule.start_date + datetime.timedelta(days=n * rule.interval * _DAYS_PER_STEP[rule.frequency])
+    months = rule.start_date.month - 1 + n * rule.interval * _MONTHS_PER_STEP[rule.frequency]
+    year, month = rule.start_date.year + months // 12, months % 12 + 1
+    return datetime.date(year, month, min(rule.start_date.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence_dates(rule: RecurringRule, first: datetime.date, last: datetime.date) -> Iterator[datetime.date]:
+    """
+    Occurrences of `rule` between `first` and `last`, inclusive. Starts from the first index that can reach `first`,
+    so catching up on a long-running rule costs nothing for the occurrences already materialized.
+    """
+    if rule.frequency in _DAYS_PER_STEP:
+        step = rule.interval * _DAYS_PER_STEP[rule.frequency]
+        n = max(0, -(-(first - rule.start_date).days // step))
+    else:
+        step = rule.interval * _MONTHS_PER_STEP[rule.frequency]
+        months = (first.year - rule.start_date.year) * 12 + first.month - rule.start_date.month
+        n = max(0, months // step)
+    while (date := nth_occurrence(rule, n)) <= last:
+        if date >= first:
+            yield date
+        n += 1
+
+
+def build_occurrence(rule: RecurringRule, date: datetime.date) -> Transaction:
+    transaction_type = TRANSACTION_TYPES[rule.transaction_type]
+    counterparty_field = f"{transaction_type.counterparty_field}_id"
+    return transaction_type(
+        description=rule.description,
+        amount=rule.amount,
+        currency=rule.currency,
+        date=date,
+        category_id=rule.category_id,
+        notes=rule.notes,
+        **{counterparty_field: getattr(rule, counterparty_field)},
+    )
+
+
+@dataclass
+class MaterializeReport:
+    rules: int = 0
+    expenses_created: int = 0
+    incomes_created: int = 0
+    duplicates_skipped: int = 0
+
+
+def _due_rules(until: datetime.date):
+    return (
+        RecurringRule.objects.filter(active=True, start_date__lte=until)
+        .filter(Q(materialized_through__isnull=True) | Q(materialized_through__lt=until))
+        .exclude(end_date__isnull=False, materialized_through__gte=F("end_date"))
+        .order_by("pk")
+    )
+
+
+def _materialize_batch(
+    rules: list[RecurringRule], until: datetime.date, insert_batch_size: int, report: MaterializeReport
+) -> int:
+    created = 0
+    pending: dict[type[Transaction], list[Transaction]] = {Expense: [], Income: []}
+    for rule in rules:
+        first = rule.materialized_through + datetime.timedelta(days=1) if rule.materialized_through else rule.start_date
+        last = min(until, rule.end_date) if rule.end_date else until
+        pending[TRANSACTION_TYPES[rule.transaction_type]] += (
+            build_occurrence(rule, date) for date in occurrence_dates(rule, first, last)
+        )
+        rule.materialized_through = last
+
+    for transaction_type, items in pending.items():
+        fingerprints = FingerprintIndex(transaction_type)
+        inserted = []
+        for start in range(0, len(items), insert_batch_size):
+            batch = items[start : start + insert_batch_size]
+            new = fingerprints.filter_new(batch)
+            transaction_type.objects.bulk_create(new)
+            inserted += new
+            report.duplicates_skipped += len(batch) - len(new)
+        # One rollup and checkpoint update per touched month and category for the whole batch of rules.
+        add_transactions_to_rollup(transaction_type, inserted)
+        created += len(inserted)
+        if transaction_type is Expense:
+            report.expenses_created += len(inserted)
+        else:
+            report.incomes_created += len(inserted)
+    RecurringRule.objects.bulk_update(rules, ["materialized_through"])
+    report.rules += len(rules)
+    return created
+
+
+def materialize_recurring(
+    until: datetime.date | None = None,
+    rule_batch_size: int = DEFAULT_RULE_BATCH_SIZE,
+    insert_batch_size: int = DEFAULT_INSERT_BATCH_SIZE,
+) -> MaterializeReport:
+    """
+    Create every occurrence of the active recurring rules up to `until` (default today), `rule_batch_size` rules per
+    transaction. Each batch locks its rules (`SKIP LOCKED`, so concurrent runs share the work instead of repeating
+    it), inserts their occurrences with `bulk_create`, folds them into the rollup and advances the rules'
+    `materialized_through`. Occurrences whose fingerprint is already stored, e.g. entered by hand, are skipped,
+    which makes re-runs after a crash idempotent as well.
+    """
+    until = until or timezone.localdate()
+    report = MaterializeReport()
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            rules = list(_due_rules(until).filter(pk__gt=last_pk).select_for_update(skip_locked=True)[:rule_batch_size])
+            if not rules:
+                break
+            last_pk = rules[-1].pk
+            if _materialize_batch(rules, until, insert_batch_size, report):
+                invalidate_dashboard_cache()
+    return report
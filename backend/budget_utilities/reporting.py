@@ -0,0 +1,63 @@
+from decimal import Decimal
+
+from django.db.models import Count, F, QuerySet
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek, TruncYear
+
+from .currency import converted_sum
+from .export import filter_transactions
+from .rollup import Transaction
+
+PERIODS = {
+    "day": TruncDay,
+    "week": TruncWeek,
+    "month": TruncMonth,
+    "year": TruncYear,
+}
+GROUPINGS = ("category", "payment_method", "source")
+
+_CENTS = Decimal("0.01")
+
+
+def get_groupings(transaction_type: type[Transaction]) -> tuple[str, ...]:
+    return ("category", transaction_type.counterparty_field)
+
+
+def _report_rows(transaction_type: type[Transaction], period: str, group_by: str, filters: dict | None) -> QuerySet:
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period: {period!r}")
+    if group_by and group_by not in get_groupings(transaction_type):
+        raise ValueError(f"{transaction_type.__name__} cannot be grouped by {group_by!r}")
+
+    queryset = filter_transactions(transaction_type.objects.order_by(), filters or {})
+    queryset = queryset.annotate(period=PERIODS[period]("date"))
+    group_fields = {"group": F(f"{group_by}__name")} if group_by else {}
+    return (
+        queryset.values("period", **group_fields)
+        .annotate(total=converted_sum(default=Decimal(0)), count=Count("id"))
+        .order_by("period", *group_fields)
+    )
+
+
+def _report_row(row: dict, group_by: str) -> dict:
+    return {
+        "period": row["period"].isoformat(),
+        **({"group": row["group"]} if group_by else {}),
+        "total": row["total"].quantize(_CENTS),
+        "count": row["count"],
+    }
+
+
+def build_report(
+    transaction_type: type[Transaction], period: str = "month", group_by: str = "", filters: dict | None = None
+) -> list[dict]:
+    """
+    Totals of `transaction_type` bucketed by `period` and optionally grouped by a related model,
+    computed with a single GROUP BY query.
+    """
+    return [_report_row(row, group_by) for row in _report_rows(transaction_type, period, group_by, filters)]
+
+
+async def abuild_report(
+    transaction_type: type[Transaction], period: str = "month", group_by: str = "", filters: dict | None = None
+) -> list[dict]:
+    return [_report_row(row, group_by) async for row in _report_rows(transaction_type, period, group_by, filters)]
@@ -0,0 +1,161 @@
+import datetime
+from collections import defaultdict
+from collections.abc import Iterable
+from decimal import Decimal
+from typing import TypeAlias
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from backend.models import Expense, Income, MonthlyCashflow
+from .balance import BALANCE_SIGNS, apply_balance_delta, rebuild_balance_snapshots
+from .currency import RateTable, converted_sum
+
+Transaction: TypeAlias = Income | Expense
+
+ROLLUP_COLUMNS = {
+    Expense: ("expense_total", "expense_count"),
+    Income: ("income_total", "income_count"),
+}
+
+
+def month_start(value: datetime.date | datetime.datetime | str) -> datetime.date:
+    date = Expense._meta.get_field("date").to_python(value)
+    return date.replace(day=1)
+
+
+def rollup_key(item: Transaction) -> tuple[datetime.date, int | None, str]:
+    return month_start(item.date), item.category_id, item.currency
+
+
+def apply_rollup_delta(
+    transaction_type: type[Transaction],
+    month: datetime.date,
+    category_id: int | None,
+    currency: str,
+    amount: Decimal,
+    count: int,
+) -> None:
+    """
+    Add `amount` and `count` to the rollup row of the given month, category and currency, creating the row if needed.
+    """
+    total_column, count_column = ROLLUP_COLUMNS[transaction_type]
+    delta = {total_column: F(total_column) + amount, count_column: F(count_column) + count}
+    rows = MonthlyCashflow.objects.filter(month=month, category_id=category_id, currency=currency)
+    if rows.update(**delta):
+        return
+    try:
+        with transaction.atomic():
+            MonthlyCashflow.objects.create(
+                month=month, category_id=category_id, currency=currency, **{total_column: amount, count_column: count}
+            )
+    except IntegrityError:
+        # Another writer created the row in the meantime.
+        rows.update(**delta)
+
+
+def add_transactions_to_rollup(
+    transaction_type: type[Transaction], transactions: Iterable[Transaction], sign: int = 1
+) -> None:
+    """
+    Fold a batch of transactions into the rollup and the balance checkpoints with one update per touched month,
+    category and currency. Used after `bulk_create`/bulk edits, which bypass the model signals. Pass `sign=-1` to
+    remove them. The checkpoints move by the amounts converted to the base currency; the rate table is only read when
+    the batch has foreign-currency amounts.
+    """
+    amount_field = transaction_type._meta.get_field("amount")
+    deltas: dict[tuple, list] = defaultdict(lambda: [Decimal(0), 0])
+    for item in transactions:
+        delta = deltas[rollup_key(item)]
+        delta[0] += amount_field.to_python(item.amount)
+        delta[1] += 1
+    rates = RateTable.load() if any(currency != settings.BASE_CURRENCY for *_, currency in deltas) else RateTable(())
+    balance_deltas: dict[datetime.date, Decimal] = defaultdict(Decimal)
+    for (month, category_id, currency), (amount, count) in deltas.items():
+        apply_rollup_delta(transaction_type, month, category_id, currency, sign * amount, sign * count)
+        balance_deltas[month] += sign * (rates.convert(amount, currency, month) or 0)
+    for month, amount in balance_deltas.items():
+        apply_balance_delta(month, BALANCE_SIGNS[transaction_type] * amount)
+
+
+def merge_uncategorized_rollup() -> None:
+    """
+    Collapse duplicate uncategorized rows left behind when a category is deleted and its rows are set to NULL.
+    """
+    uncategorized = MonthlyCashflow.objects.filter(category__isnull=True)
+    merged = list(
+        uncategorized.values("month", "currency")
+        .annotate(
+            expense_sum=Sum("expense_total"),
+            expense_rows=Sum("expense_count"),
+            income_sum=Sum("income_total"),
+            income_rows=Sum("income_count"),
+            duplicates=Count("id"),
+        )
+        .filter(duplicates__gt=1)
+    )
+    if not merged:
+        return
+    with transaction.atomic():
+        for row in merged:
+            uncategorized.filter(month=row["month"], currency=row["currency"]).delete()
+        MonthlyCashflow.objects.bulk_create(
+            MonthlyCashflow(
+                month=row["month"],
+                category=None,
+                currency=row["currency"],
+                expense_total=row["expense_sum"],
+                expense_count=row["expense_rows"],
+                income_total=row["income_sum"],
+                income_count=row["income_rows"],
+            )
+            for row in merged
+        )
+
+
+def rollup_converted_sum(column: str, **extra):
+    """
+    Sum of a rollup total column in the base currency, converted row by row at each row's month's rate.
+    """
+    return converted_sum(column, date="month", **extra)
+
+
+def get_rollup_total(transaction_type: type[Transaction]) -> Decimal:
+    """
+    All-time total of `transaction_type` in the base currency, converted inside the database.
+    """
+    total_column, _ = ROLLUP_COLUMNS[transaction_type]
+    return MonthlyCashflow.objects.aggregate(total=rollup_converted_sum(total_column))["total"] or Decimal(0)
+
+
+async def aget_rollup_total(transaction_type: type[Transaction]) -> Decimal:
+    total_column, _ = ROLLUP_COLUMNS[transaction_type]
+    return (await MonthlyCashflow.objects.aaggregate(total=rollup_converted_sum(total_column)))["total"] or Decimal(0)
+
+
+def rebuild_rollup() -> int:
+    """
+    Recompute the whole rollup table from the transaction tables with one grouped query per type, then the balance
+    checkpoints from it. Returns the number of rollup rows written.
+    """
+    rows: dict[tuple, MonthlyCashflow] = {}
+    for transaction_type, (total_column, count_column) in ROLLUP_COLUMNS.items():
+        grouped = (
+            transaction_type.objects.order_by()
+            .annotate(month=TruncMonth("date"))
+            .values("month", "category_id", "currency")
+            .annotate(total=Sum("amount"), count=Count("id"))
+        )
+        for group in grouped.iterator():
+            key = (group["month"], group["category_id"], group["currency"])
+            row = rows.setdefault(key, MonthlyCashflow(month=key[0], category_id=key[1], currency=key[2]))
+            setattr(row, total_column, group["total"])
+            setattr(row, count_column, group["count"])
+
+    with transaction.atomic():
+        MonthlyCashflow.objects.all().delete()
+        MonthlyCashflow.objects.bulk_create(rows.values(), batch_size=1000)
+        rebuild_balance_snapshots()
+    return len(rows)
@@ -0,0 +1,131 @@
+import re
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import F, Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from .rollup import Transaction
+
+SEARCH_FIELDS = ("description", "notes")
+SEARCH_CONFIG = "english"
+SEARCH_RESULTS_LIMIT = 50
+
+_TOKEN = re.compile(r"\w+")
+
+
+def search_vector() -> SearchVector:
+    """
+    The indexed expression. Queries must use exactly this expression for PostgreSQL to pick the GIN index.
+    """
+    return SearchVector(*SEARCH_FIELDS, config=SEARCH_CONFIG)
+
+
+def _search_index(model) -> GinIndex:
+    return GinIndex(search_vector(), name=f"{model._meta.model_name}_search_idx")
+
+
+def _fts_table(model) -> str:
+    return f"{model._meta.db_table}_fts"
+
+
+def install_search_index(schema_editor, model) -> None:
+    """
+    Create the full-text index of a transaction table: a GIN index over `search_vector()` on PostgreSQL, an FTS5
+    external-content table kept in sync by triggers on SQLite. Idempotent on SQLite, so migrations that make SQLite
+    rebuild the transaction table (which drops its triggers) can simply call it again.
+    """
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.add_index(model, _search_index(model))
+    elif schema_editor.connection.vendor == "sqlite":
+        table, fts = model._meta.db_table, _fts_table(model)
+        columns = ", ".join(SEARCH_FIELDS)
+        new_values = ", ".join(f"new.{field}" for field in SEARCH_FIELDS)
+        old_values = ", ".join(f"old.{field}" for field in SEARCH_FIELDS)
+        delete_old = f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+        insert_new = f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});"
+        for statement in (
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{columns}, content='{table}', content_rowid='id', tokenize='porter unicode61')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN {insert_new} END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN {delete_old} END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {columns} ON {table} "
+            f"BEGIN {delete_old} {insert_new} END",
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        ):
+            schema_editor.execute(statement)
+
+
+def uninstall_search_index(schema_editor, model) -> None:
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.remove_index(model, _search_index(model))
+    elif schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {_fts_table(model)}")
+        for trigger in ("insert", "delete", "update"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {_fts_table(model)}_{trigger}")
+
+
+def _fts_match(terms: str) -> str:
+    """
+    FTS5 query matching rows that contain every word of `terms`. Words are quoted, so user input is never parsed
+    as FTS5 syntax.
+    """
+    return " ".join(f'"{token}"' for token in _TOKEN.findall(terms))
+
+
+def _sqlite_matches(model, terms: str) -> RawSQL:
+    fts = _fts_table(model)
+    return RawSQL(f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s", [_fts_match(terms)])
+
+
+def search_filter(queryset: QuerySet, terms: str) -> QuerySet:
+    """
+    Narrow a transaction queryset to the rows whose description or notes match `terms`, keeping its ordering.
+    """
+    if not _TOKEN.search(terms):
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        query = SearchQuery(terms, config=SEARCH_CONFIG, search_type="websearch")
+        return queryset.annotate(search=search_vector()).filter(search=query)
+    if vendor == "sqlite":
+        return queryset.filter(pk__in=_sqlite_matches(queryset.model, terms))
+    return queryset.filter(Q(description__icontains=terms) | Q(notes__icontains=terms))
+
+
+def search_transactions(
+    transaction_type: type[Transaction], terms: str, limit: int = SEARCH_RESULTS_LIMIT
+) -> list[Transaction]:
+    """
+    The `limit` best matches for `terms`, best first, each with a `rank` where higher means more relevant.
+    """
+    if not _TOKEN.search(terms):
+        return []
+    queryset = transaction_type.objects.with_related()
+    database = connections[queryset.db]
+    if database.vendor == "postgresql":
+        query = SearchQuery(terms, config=SEARCH_CONFIG, search_type="websearch")
+        return list(
+            queryset.annotate(search=search_vector())
+            .filter(search=query)
+            .annotate(rank=SearchRank(F("search"), query))
+            .order_by("-rank", "-date")[:limit]
+        )
+    if database.vendor == "sqlite":
+        fts = _fts_table(transaction_type)
+        with database.cursor() as cursor:
+            # bm25() is lower for better matches.
+            cursor.execute(
+                f"SELECT rowid, -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s ORDER BY bm25({fts}) LIMIT %s",
+                [_fts_match(terms), limit],
+            )
+            ranks = dict(cursor.fetchall())
+        results = list(queryset.filter(pk__in=ranks))
+        for item in results:
+            item.rank = ranks[item.pk]
+        return sorted(results, key=lambda item: item.rank, reverse=True)
+    results = list(search_filter(queryset, terms).order_by("-date")[:limit])
+    for item in results:
+        item.rank = 0.0
+    return results
@@ -0,0 +1,113 @@
+import datetime
+import random
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from backend.models import Category, Expense, Income, IncomeSource, PaymentMethod
+from .caching import invalidate_dashboard_cache
+from .dedupe import FingerprintIndex
+from .rollup import Transaction, rebuild_rollup
+
+CATEGORY_NAMES = (
+    "Groceries",
+    "Rent",
+    "Utilities",
+    "Transport",
+    "Eating Out",
+    "Entertainment",
+    "Health",
+    "Clothing",
+    "Travel",
+    "Subscriptions",
+    "Gifts",
+    "Education",
+    "Salary",
+    "Bonus",
+    "Investments",
+)
+PAYMENT_METHOD_NAMES = ("Cash", "Debit Card", "Credit Card", "Bank Transfer", "Mobile Payment")
+INCOME_SOURCE_NAMES = ("Main Job", "Side Project", "Freelance Client", "Dividends", "Tax Refund")
+
+_EXPENSE_DESCRIPTIONS = ("Supermarket", "Coffee", "Train ticket", "Dinner", "Cinema", "Pharmacy", "Online order")
+_INCOME_DESCRIPTIONS = ("Monthly salary", "Invoice", "Dividend payout", "Refund", "Bonus")
+_INCOME_CATEGORY_NAMES = ("Salary", "Bonus", "Investments")
+
+
+def _ensure_names(model, names: tuple[str, ...]) -> list[int]:
+    model.objects.bulk_create([model(name=name) for name in names], ignore_conflicts=True)
+    return list(model.objects.filter(name__in=names).values_list("pk", flat=True))
+
+
+class LedgerGenerator:
+    """
+    Generates a realistic-looking ledger with `bulk_create`: most expenses are small and frequent,
+    incomes are fewer and larger, and dates are spread uniformly over the last `years` years.
+    """
+
+    def __init__(self, years: int = 10, batch_size: int = 5000, seed: int | None = None):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.end_date = timezone.localdate()
+        self.days = 365 * years
+        self.category_ids = _ensure_names(Category, CATEGORY_NAMES)
+        self.income_category_ids = list(
+            Category.objects.filter(name__in=_INCOME_CATEGORY_NAMES).values_list("pk", flat=True)
+        )
+        self.payment_method_ids = _ensure_names(PaymentMethod, PAYMENT_METHOD_NAMES)
+        self.source_ids = _ensure_names(IncomeSource, INCOME_SOURCE_NAMES)
+
+    def _date(self) -> datetime.date:
+        return self.end_date - datetime.timedelta(days=self.random.randrange(self.days))
+
+    def _amount(self, mu: float, sigma: float) -> Decimal:
+        return Decimal(f"{min(self.random.lognormvariate(mu, sigma), 99_999_999):.2f}")
+
+    def build_expense(self) -> Expense:
+        return Expense(
+            description=f"{self.random.choice(_EXPENSE_DESCRIPTIONS)} #{self.random.randrange(10_000)}",
+            amount=self._amount(3.0, 1.0),
+            date=self._date(),
+            category_id=self.random.choice(self.category_ids),
+            payment_method_id=self.random.choice(self.payment_method_ids),
+        )
+
+    def build_income(self) -> Income:
+        return Income(
+            description=f"{self.random.choice(_INCOME_DESCRIPTIONS)} #{self.random.randrange(10_000)}",
+            amount=self._amount(7.5, 0.5),
+            date=self._date(),
+            category_id=self.random.choice(self.income_category_ids),
+            source_id=self.random.choice(self.source_ids),
+        )
+
+    def generate(self, transaction_type: type[Transaction], count: int) -> int:
+        build = self.build_expense if transaction_type is Expense else self.build_income
+        attempted = created = 0
+        while attempted < count:
+            size = min(self.batch_size, count - attempted)
+            # A fresh index per batch keeps memory flat for millions of rows; repeats of earlier batches are found
+            # in the table and skipped.
+            batch = FingerprintIndex(transaction_type).filter_new(build() for _ in range(size))
+            with transaction.atomic():
+                transaction_type.objects.bulk_create(batch)
+            attempted += size
+            created += len(batch)
+        return created
+
+
+def generate_ledger(
+    expenses: int, incomes: int, years: int = 10, batch_size: int = 5000, seed: int | None = None
+) -> dict[str, int]:
+    """
+    Append synthetic expenses and incomes to the ledger and rebuild the monthly rollup once at the end.
+    """
+    generator = LedgerGenerator(years=years, batch_size=batch_size, seed=seed)
+    counts = {
+        "expenses": generator.generate(Expense, expenses),
+        "incomes": generator.generate(Income, incomes),
+    }
+    counts["rollup_rows"] = rebuild_rollup()
+    invalidate_dashboard_cache()
+    return counts
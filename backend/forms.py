@@ -1,4 +1,5 @@
 from django import forms
+from .budget_utilities.reporting import GROUPINGS, PERIODS
 from .models import Category, PaymentMethod, IncomeSource, Expense, Income
 
 
@@ -23,7 +24,7 @@ class IncomeSourceForm(forms.ModelForm):
 class ExpenseForm(forms.ModelForm):
     class Meta:
         model = Expense
-        fields = ["description", "amount", "date", "category", "payment_method", "notes"]
+        fields = ["description", "amount", "currency", "date", "category", "payment_method", "notes"]
         widgets = {
             "date": forms.DateInput(attrs={"type": "date"}),
         }
@@ -32,7 +33,36 @@ class ExpenseForm(forms.ModelForm):
 class IncomeForm(forms.ModelForm):
     class Meta:
         model = Income
-        fields = ["description", "amount", "date", "category", "source", "notes"]
+        fields = ["description", "amount", "currency", "date", "category", "source", "notes"]
         widgets = {
             "date": forms.DateInput(attrs={"type": "date"}),
         }
+
+
+class DateRangeForm(forms.Form):
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+
+
+class TransactionFilterForm(DateRangeForm):
+    q = forms.CharField(required=False, max_length=200, label="Search")
+    category = forms.IntegerField(required=False, min_value=1)
+    payment_method = forms.IntegerField(required=False, min_value=1)
+    source = forms.IntegerField(required=False, min_value=1)
+
+
+class StatementImportForm(forms.Form):
+    statement = forms.FileField(help_text="Bank statement as CSV (date, description, amount, ...) or OFX/QFX")
+    create_missing = forms.BooleanField(
+        required=False, help_text="Create unknown categories, payment methods and sources"
+    )
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(max_length=200, label="Search")
+    type = forms.ChoiceField(choices=[("", "all"), ("expense", "expense"), ("income", "income")], required=False)
+
+
+class ReportForm(TransactionFilterForm):
+    period = forms.ChoiceField(choices=[(period, period) for period in PERIODS], required=False)
+    group_by = forms.ChoiceField(choices=[("", "none"), *((field, field) for field in GROUPINGS)], required=False)
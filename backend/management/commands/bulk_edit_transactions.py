@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.budget_utilities.bulk_edit import reassign_counterparty, recategorize
+from backend.budget_utilities.export import filter_transactions
+from backend.forms import TransactionFilterForm
+from backend.models import Category, Expense, Income
+
+TRANSACTION_TYPES = {"expense": Expense, "income": Income}
+
+
+class Command(BaseCommand):
+    help = "Recategorize, or change the payment method/source of, every matching transaction with one UPDATE."
+
+    def add_arguments(self, parser):
+        parser.add_argument("type", choices=TRANSACTION_TYPES)
+        parser.add_argument("--date-from", help="Only transactions on or after this date (YYYY-MM-DD)")
+        parser.add_argument("--date-to", help="Only transactions on or before this date (YYYY-MM-DD)")
+        parser.add_argument("--category", type=int, help="Only transactions of this category id")
+        parser.add_argument("--counterparty", type=int, help="Only transactions of this payment method/source id")
+        parser.add_argument("--q", help="Only transactions whose description or notes match this search")
+        parser.add_argument("--set-category", type=int, help="Move the transactions to this category id")
+        parser.add_argument("--set-counterparty", type=int, help="Set this payment method/source id")
+
+    def handle(self, *args, **options):
+        transaction_type = TRANSACTION_TYPES[options["type"]]
+        if options["set_category"] is None and options["set_counterparty"] is None:
+            raise CommandError("Pass --set-category and/or --set-counterparty")
+        form = TransactionFilterForm(
+            {
+                "date_from": options["date_from"],
+                "date_to": options["date_to"],
+                "category": options["category"],
+                transaction_type.counterparty_field: options["counterparty"],
+                "q": options["q"],
+            }
+        )
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        queryset = filter_transactions(transaction_type.objects.all(), form.cleaned_data)
+
+        if options["set_category"] is not None:
+            category = self._get(Category, options["set_category"])
+            moved = recategorize(queryset, category)
+            self.stdout.write(self.style.SUCCESS(f"Moved {moved} transactions to {category}."))
+        if options["set_counterparty"] is not None:
+            counterparty_model = transaction_type._meta.get_field(transaction_type.counterparty_field).related_model
+            counterparty = self._get(counterparty_model, options["set_counterparty"])
+            changed = reassign_counterparty(queryset, counterparty)
+            self.stdout.write(self.style.SUCCESS(f"Set {counterparty} on {changed} transactions."))
+
+    def _get(self, model, pk):
+        try:
+            return model.objects.get(pk=pk)
+        except model.DoesNotExist as error:
+            raise CommandError(f"No {model._meta.verbose_name} with id {pk}") from error
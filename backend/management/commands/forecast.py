@@ -0,0 +1,33 @@
+import datetime
+import json
+
+from django.core.management.base import BaseCommand
+
+from backend.budget_utilities.forecasting import build_forecast
+
+
+class Command(BaseCommand):
+    help = "Forecast the month-end balance and per-category spending of the current month."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=datetime.date.fromisoformat, help="Forecast as of this day (YYYY-MM-DD)")
+        parser.add_argument("--json", action="store_true", help="Print the forecast as JSON")
+
+    def handle(self, *args, **options):
+        forecast = build_forecast(options["date"])
+        if options["json"]:
+            self.stdout.write(json.dumps(forecast.as_dict(), indent=2))
+            return
+        self.stdout.write(f"Forecast for {forecast.month:%B %Y}")
+        self.stdout.write(f"Net balance:                   {forecast.net_balance:>14.2f}")
+        self.stdout.write(f"Projected month-end balance:   {forecast.projected_month_end_balance:>14.2f}")
+        self.stdout.write(
+            f"Expected expense / income:     {forecast.expected_expense:>14.2f} / {forecast.expected_income:.2f}"
+        )
+        self.stdout.write("")
+        self.stdout.write(f"{'Category':<25} {'To date':>12} {'Run rate':>12} {'3-mo mean':>12} {'Forecast':>12}")
+        for row in forecast.categories:
+            self.stdout.write(
+                f"{row['category']:<25} {row['month_to_date']:>12.2f} {row['run_rate']:>12.2f} "
+                f"{row['rolling_mean']:>12.2f} {row['forecast']:>12.2f}"
+            )
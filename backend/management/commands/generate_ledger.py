@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.budget_utilities.synthetic import generate_ledger
+
+
+class Command(BaseCommand):
+    help = "Fill the database with a synthetic ledger for benchmarking (10k to 10M rows)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--expenses", type=int, default=10_000)
+        parser.add_argument("--incomes", type=int, default=1_000)
+        parser.add_argument("--years", type=int, default=10, help="Spread the transactions over this many years")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, help="Random seed, for reproducible ledgers")
+
+    def handle(self, *args, **options):
+        if min(options["expenses"], options["incomes"]) < 0 or options["years"] < 1 or options["batch_size"] < 1:
+            raise CommandError("Counts must be non-negative, --years and --batch-size positive")
+        counts = generate_ledger(
+            expenses=options["expenses"],
+            incomes=options["incomes"],
+            years=options["years"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {counts['expenses']} expenses and {counts['incomes']} incomes "
+                f"({counts['rollup_rows']} rollup rows)."
+            )
+        )
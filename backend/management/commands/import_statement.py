@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.budget_utilities.importing import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_DATE_FORMAT,
+    detect_statement_format,
+    import_statement,
+)
+
+
+class Command(BaseCommand):
+    help = "Import expenses and incomes from a bank statement (CSV or OFX) with batched inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the CSV or OFX/QFX statement")
+        parser.add_argument("--format", choices=("csv", "ofx"), help="Statement format (default: from extension)")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--date-format", default=DEFAULT_DATE_FORMAT, help="strptime format of CSV dates")
+        parser.add_argument("--encoding", default="utf-8-sig")
+        parser.add_argument(
+            "--create-missing",
+            action="store_true",
+            help="Create unknown categories, payment methods and sources instead of rejecting the row",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+        statement_format = options["format"] or detect_statement_format(options["path"])
+        try:
+            with open(options["path"], newline="", encoding=options["encoding"]) as stream:
+                report = import_statement(
+                    stream,
+                    statement_format=statement_format,
+                    batch_size=options["batch_size"],
+                    create_missing=options["create_missing"],
+                    date_format=options["date_format"],
+                )
+        except OSError as error:
+            raise CommandError(str(error)) from error
+
+        for line_number, message in report.errors:
+            self.stderr.write(f"line {line_number}: {message}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report.expenses_created} expenses and {report.incomes_created} incomes "
+                f"({report.duplicates_skipped} duplicates skipped, {len(report.errors)} rows rejected)."
+            )
+        )
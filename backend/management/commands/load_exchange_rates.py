@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.budget_utilities.currency import currencies_without_rates
+from backend.budget_utilities.importing import DEFAULT_DATE_FORMAT, ExchangeRateError, load_exchange_rates
+
+
+class Command(BaseCommand):
+    help = "Load monthly exchange rates to the base currency from a CSV file (currency,date,rate)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the CSV file")
+        parser.add_argument("--date-format", default=DEFAULT_DATE_FORMAT, help="strptime format of the dates")
+        parser.add_argument("--encoding", default="utf-8-sig")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], newline="", encoding=options["encoding"]) as stream:
+                loaded = load_exchange_rates(stream, date_format=options["date_format"])
+        except (OSError, ExchangeRateError) as error:
+            raise CommandError(str(error)) from error
+
+        missing = currencies_without_rates()
+        if missing:
+            self.stderr.write(f"No rates yet for {', '.join(missing)}; their amounts are left out of the totals.")
+        self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} exchange rates to {settings.BASE_CURRENCY}."))
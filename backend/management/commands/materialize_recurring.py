@@ -0,0 +1,33 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.budget_utilities.recurring import (
+    DEFAULT_INSERT_BATCH_SIZE,
+    DEFAULT_RULE_BATCH_SIZE,
+    materialize_recurring,
+)
+
+
+class Command(BaseCommand):
+    help = "Create the due occurrences of every recurring rule up to a date (default today). Safe to run from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--until", type=datetime.date.fromisoformat, help="Last date to materialize (YYYY-MM-DD)")
+        parser.add_argument("--rule-batch-size", type=int, default=DEFAULT_RULE_BATCH_SIZE)
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_INSERT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options["rule_batch_size"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--rule-batch-size and --batch-size must be positive")
+        report = materialize_recurring(
+            until=options["until"],
+            rule_batch_size=options["rule_batch_size"],
+            insert_batch_size=options["batch_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Materialized {report.rules} rules: {report.expenses_created} expenses and "
+                f"{report.incomes_created} incomes created ({report.duplicates_skipped} duplicates skipped)."
+            )
+        )
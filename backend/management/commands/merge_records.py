@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.budget_utilities.bulk_edit import merge_records
+from backend.models import Category, IncomeSource, PaymentMethod
+
+RECORD_TYPES = {"category": Category, "payment-method": PaymentMethod, "source": IncomeSource}
+
+
+class Command(BaseCommand):
+    help = "Merge duplicate categories, payment methods or income sources into one, moving their transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=RECORD_TYPES)
+        parser.add_argument("target", type=int, help="Id of the record to keep")
+        parser.add_argument("duplicates", type=int, nargs="+", help="Ids of the records to merge into it and delete")
+
+    def handle(self, *args, **options):
+        model = RECORD_TYPES[options["kind"]]
+        try:
+            target = model.objects.get(pk=options["target"])
+        except model.DoesNotExist as error:
+            raise CommandError(f"No {model._meta.verbose_name} with id {options['target']}") from error
+        duplicates = list(model.objects.filter(pk__in=options["duplicates"]).exclude(pk=target.pk))
+        missing = set(options["duplicates"]) - {duplicate.pk for duplicate in duplicates} - {target.pk}
+        if missing:
+            raise CommandError(f"No {model._meta.verbose_name} with id {', '.join(map(str, sorted(missing)))}")
+        moved = merge_records(target, duplicates)
+        self.stdout.write(
+            self.style.SUCCESS(f"Merged {len(duplicates)} records into {target} ({moved} transactions moved).")
+        )
@@ -0,0 +1,63 @@
+import json
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+_PERCENTILES = (50, 95, 99)
+
+
+def _percentile(sorted_values: list[float], percentile: int) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    rank = max(1, math.ceil(percentile / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Command(BaseCommand):
+    help = "Aggregate the performance log into p50/p95/p99 request timings per URL name."
+
+    def add_arguments(self, parser):
+        parser.add_argument("log_file", nargs="?", help="Performance log (default: PERFORMANCE_LOG_FILE)")
+        parser.add_argument("--metric", default="total_ms", choices=("total_ms", "db_ms", "template_ms", "db_queries"))
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        metric = options["metric"]
+        samples: dict[str, list[float]] = defaultdict(list)
+        skipped = 0
+        try:
+            with open(options["log_file"] or settings.PERFORMANCE_LOG_FILE, encoding="utf-8") as log:
+                for line in log:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        record = None
+                    # Lines of other loggers or older log formats lack the metric and are skipped, not fatal.
+                    value = record.get(metric) if isinstance(record, dict) else None
+                    if not isinstance(value, (int, float)):
+                        skipped += 1
+                        continue
+                    samples[record.get("url_name") or "<unresolved>"].append(value)
+        except OSError as error:
+            raise CommandError(str(error)) from error
+
+        report = {}
+        for url_name, values in sorted(samples.items()):
+            values.sort()
+            report[url_name] = {"count": len(values)} | {
+                f"p{percentile}": _percentile(values, percentile) for percentile in _PERCENTILES
+            }
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"metric": metric, "urls": report, "skipped": skipped}, indent=2))
+            return
+        self.stdout.write(f"{'URL name':<40} {'count':>8} {'p50':>10} {'p95':>10} {'p99':>10}  ({metric})")
+        for url_name, row in report.items():
+            self.stdout.write(
+                f"{url_name:<40} {row['count']:>8} {row['p50']:>10.2f} {row['p95']:>10.2f} {row['p99']:>10.2f}"
+            )
+        if skipped:
+            self.stdout.write(f"Skipped {skipped} log lines without a {metric} value.")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from backend.budget_utilities.caching import invalidate_dashboard_cache
+from backend.budget_utilities.rollup import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly cashflow rollup and the balance checkpoints from the expense and income tables."
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollup()
+        invalidate_dashboard_cache()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt monthly cashflow rollup ({rows} rows)."))
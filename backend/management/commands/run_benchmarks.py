@@ -0,0 +1,150 @@
+import json
+import math
+import statistics
+import subprocess
+from collections.abc import Callable
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from backend.budget_utilities.caching import dashboard_cache_key
+from backend.budget_utilities.cashflow import get_most_recent_transactions, get_total_of_transaction_type
+from backend.budget_utilities.freshness import get_ledger_version
+from backend.budget_utilities.pagination import encode_cursor
+from backend.models import Category, Expense, Income
+
+_PER_PAGE = 10
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def _summarize(durations: list[float]) -> dict[str, float]:
+    durations = sorted(duration * 1000 for duration in durations)
+    return {
+        "min_ms": round(durations[0], 3),
+        "p50_ms": round(statistics.median(durations), 3),
+        "p95_ms": round(durations[max(0, math.ceil(0.95 * len(durations)) - 1)], 3),
+        "mean_ms": round(statistics.fmean(durations), 3),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the dashboard, list, detail and cashflow code paths against the configured database "
+        "and print the results as JSON. Fill the database first with `generate_ledger`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per benchmark")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed runs per benchmark")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+        parser.add_argument("--compare", help="Previous JSON report to print p50 ratios against")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be positive")
+        expense_count = Expense.objects.count()
+        if expense_count <= _PER_PAGE:
+            # The deep keyset benchmark starts after the first page.
+            raise CommandError(
+                f"The ledger has {expense_count} expenses, at least {_PER_PAGE + 1} are needed: "
+                "run `manage.py generate_ledger` first"
+            )
+
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            results = {
+                name: _summarize(self.time(benchmark, options["warmup"], options["repeat"]))
+                for name, benchmark in self.benchmarks(expense_count).items()
+            }
+
+        report = {
+            "commit": _git_commit(),
+            "timestamp": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "rows": {"expenses": expense_count, "incomes": Income.objects.count()},
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as report_file:
+                report_file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+        if options["compare"]:
+            self.compare(results, options["compare"])
+
+    def benchmarks(self, expense_count: int) -> dict[str, Callable[[], object]]:
+        client = Client()
+        expense_list = reverse("backend:expense_list")
+        deep_page = max(1, math.ceil(expense_count / _PER_PAGE) - 1)
+        deep_row = Expense.objects.order_by("date", "created_at", "id")[_PER_PAGE]
+        busiest_category = Category.objects.annotate(expense_count=Count("expenses")).order_by("-expense_count").first()
+
+        def get(url: str, prepare: Callable[[], object] | None = None) -> Callable[[], object]:
+            def request():
+                if prepare:
+                    prepare()
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"GET {url} returned {response.status_code}")
+
+            return request
+
+        def drop_dashboard_cache():
+            cache.delete(dashboard_cache_key(get_ledger_version(), timezone.localdate()))
+
+        def drop_dashboard_cache_and_connections():
+            # What every request pays with CONN_MAX_AGE=0 and no pool: a fresh connection.
+            drop_dashboard_cache()
+            connections.close_all()
+
+        return {
+            "home": get(reverse("backend:home")),
+            "home_uncached_reused_connection": get(reverse("backend:home"), drop_dashboard_cache),
+            "home_uncached_new_connection": get(reverse("backend:home"), drop_dashboard_cache_and_connections),
+            "expense_list_first_page": get(expense_list),
+            "expense_list_deep_offset": get(f"{expense_list}?page={deep_page}"),
+            "expense_list_deep_keyset": get(f"{expense_list}?after={encode_cursor(deep_row)}"),
+            "category_detail": get(reverse("backend:category_detail", args=[busiest_category.pk])),
+            "cashflow_total_expense": lambda: get_total_of_transaction_type(Expense),
+            "cashflow_total_income": lambda: get_total_of_transaction_type(Income),
+            "cashflow_recent_expenses": lambda: list(get_most_recent_transactions(Expense)),
+        }
+
+    @staticmethod
+    def time(benchmark: Callable[[], object], warmup: int, repeat: int) -> list[float]:
+        for _ in range(warmup):
+            benchmark()
+        durations = []
+        for _ in range(repeat):
+            start = perf_counter()
+            benchmark()
+            durations.append(perf_counter() - start)
+        return durations
+
+    def compare(self, results: dict, baseline_path: str) -> None:
+        try:
+            with open(baseline_path, encoding="utf-8") as baseline_file:
+                baseline = json.load(baseline_file)["results"]
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f"Cannot read baseline report: {error}") from error
+        for name, result in results.items():
+            if name in baseline and baseline[name]["p50_ms"]:
+                ratio = result["p50_ms"] / baseline[name]["p50_ms"]
+                self.stderr.write(f"{name:<30} p50 {result['p50_ms']:>10.3f} ms  x{ratio:.2f} vs baseline")
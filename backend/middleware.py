@@ -0,0 +1,178 @@
+import functools
+import json
+import logging
+from contextlib import ExitStack
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger("backend.performance")
+
+_SLOWEST_SQL_MAX_LENGTH = 500
+
+PRIMARY_STICKY_COOKIE = "budget_read_primary"
+_SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+_current_metrics: ContextVar["RequestMetrics | None"] = ContextVar("request_metrics", default=None)
+
+
+@dataclass
+class RequestMetrics:
+    db_queries: int = 0
+    db_time: float = 0.0
+    template_time: float = 0.0
+    slowest_sql: str = ""
+    slowest_sql_time: float = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - start
+            self.db_queries += 1
+            self.db_time += duration
+            if duration > self.slowest_sql_time:
+                self.slowest_sql, self.slowest_sql_time = sql, duration
+
+
+def _instrument_template_rendering() -> None:
+    """
+    Wrap Django template rendering once per process, so rendering time lands in the metrics of the current request.
+    """
+    if getattr(Template.render, "is_timed", False):
+        return
+    render = Template.render
+
+    @functools.wraps(render)
+    def timed_render(self, context=None, request=None):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return render(self, context, request)
+        start = perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            metrics.template_time += perf_counter() - start
+
+    timed_render.is_timed = True
+    Template.render = timed_render
+
+
+def _milliseconds(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+class PerformanceMiddleware:
+    """
+    Records wall time, query count, DB time, template render time and the slowest SQL statement of every request.
+    Emits them as a `Server-Timing` header and as a JSON line on the `backend.performance` logger.
+
+    Enabled with `PERFORMANCE_INSTRUMENTATION`. Queries run while a streaming response is consumed are not counted.
+    Runs natively in both the sync and the async handler, so it does not push async views onto a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        _instrument_template_rendering()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = perf_counter()
+        try:
+            with self._record_queries(metrics):
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        return self._report(request, response, metrics, perf_counter() - start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = perf_counter()
+        # Connections are per thread: wrap those of the thread that runs this request's thread-sensitive ORM calls.
+        queries = await sync_to_async(self._record_queries)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(queries.close)()
+            _current_metrics.reset(token)
+        return self._report(request, response, metrics, perf_counter() - start)
+
+    @staticmethod
+    def _record_queries(metrics: RequestMetrics) -> ExitStack:
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics.record_query))
+        return stack
+
+    @staticmethod
+    def _report(request, response, metrics: RequestMetrics, total_time: float):
+        response.headers["Server-Timing"] = ", ".join(
+            (
+                f"total;dur={_milliseconds(total_time)}",
+                f'db;dur={_milliseconds(metrics.db_time)};desc="{metrics.db_queries} queries"',
+                f"template;dur={_milliseconds(metrics.template_time)}",
+                f"slowest-sql;dur={_milliseconds(metrics.slowest_sql_time)}",
+            )
+        )
+        match = request.resolver_match
+        logger.info(
+            json.dumps(
+                {
+                    "url_name": match.view_name if match else None,
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "total_ms": _milliseconds(total_time),
+                    "db_queries": metrics.db_queries,
+                    "db_ms": _milliseconds(metrics.db_time),
+                    "template_ms": _milliseconds(metrics.template_time),
+                    "slowest_sql_ms": _milliseconds(metrics.slowest_sql_time),
+                    "slowest_sql": metrics.slowest_sql[:_SLOWEST_SQL_MAX_LENGTH],
+                }
+            )
+        )
+        return response
+
+
+class PrimaryStickinessMiddleware(MiddlewareMixin):
+    """
+    Read-your-writes for replica routing: after a write (any unsafe request), the client keeps reading from the
+    primary for `REPLICA_STICKY_SECONDS`, tracked with a cookie, so it never sees a replica that has not caught up.
+
+    Only active when `REPLICA_DATABASES` is set. Sets `request.read_from_primary` for `backend.routers.replica_reads`.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REPLICA_DATABASES:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_request(self, request):
+        request.read_from_primary = PRIMARY_STICKY_COOKIE in request.COOKIES
+
+    def process_response(self, request, response):
+        if request.method not in _SAFE_METHODS and response.status_code < 500:
+            response.set_cookie(
+                PRIMARY_STICKY_COOKIE, "1", max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite="Lax"
+            )
+        return response
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_monthly_cashflow(apps, schema_editor):
+    MonthlyCashflow = apps.get_model("backend", "MonthlyCashflow")
+    rows = {}
+    for model_name, prefix in (("Expense", "expense"), ("Income", "income")):
+        grouped = (
+            apps.get_model("backend", model_name)
+            .objects.order_by()
+            .annotate(month=TruncMonth("date"))
+            .values("month", "category_id")
+            .annotate(total=Sum("amount"), count=Count("id"))
+        )
+        for group in grouped:
+            key = (group["month"], group["category_id"])
+            row = rows.setdefault(key, MonthlyCashflow(month=key[0], category_id=key[1]))
+            setattr(row, f"{prefix}_total", group["total"])
+            setattr(row, f"{prefix}_count", group["count"])
+    MonthlyCashflow.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("backend", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlyCashflow",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("month", models.DateField(help_text="First day of the month the totals belong to")),
+                ("expense_total", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("expense_count", models.PositiveIntegerField(default=0)),
+                ("income_total", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("income_count", models.PositiveIntegerField(default=0)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Category of the aggregated transactions",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="monthly_cashflows",
+                        to="backend.category",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-month"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("month", "category"), name="unique_month_category_cashflow")
+                ],
+            },
+        ),
+        migrations.RunPython(populate_monthly_cashflow, migrations.RunPython.noop),
+    ]
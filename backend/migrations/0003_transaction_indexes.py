@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("backend", "0002_monthlycashflow"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="expense",
+            index=models.Index(fields=["date", "created_at"], name="expense_date_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="expense",
+            index=models.Index(fields=["category", "date"], name="expense_category_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="expense",
+            index=models.Index(fields=["payment_method", "date"], name="expense_payment_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="income",
+            index=models.Index(fields=["date", "created_at"], name="income_date_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="income",
+            index=models.Index(fields=["category", "date"], name="income_category_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="income",
+            index=models.Index(fields=["source", "date"], name="income_source_date_idx"),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:43
+
+import hashlib
+from collections import Counter
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+# Frozen copies of `backend.budget_utilities.dedupe.content_key` and `compute_fingerprint` as of this migration,
+# so later changes to the live hashing do not change what replaying it writes.
+def content_key(date, amount, description, counterparty_id):
+    normalized_description = " ".join((description or "").casefold().split())
+    return "|".join((date.isoformat(), f"{Decimal(amount):.2f}", normalized_description, str(counterparty_id or "")))
+
+
+def compute_fingerprint(key, occurrence=0):
+    return hashlib.sha256(f"{key}|{occurrence}".encode()).hexdigest()
+
+
+def backfill_fingerprints(apps, schema_editor):
+    for model_name, counterparty_field in (("Expense", "payment_method_id"), ("Income", "source_id")):
+        model = apps.get_model("backend", model_name)
+        occurrences = Counter()
+        batch = []
+        for item in model.objects.order_by("id").iterator(chunk_size=2000):
+            key = content_key(item.date, item.amount, item.description, getattr(item, counterparty_field))
+            item.fingerprint = compute_fingerprint(key, occurrences[key])
+            occurrences[key] += 1
+            batch.append(item)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ["fingerprint"])
+                batch = []
+        model.objects.bulk_update(batch, ["fingerprint"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("backend", "0003_transaction_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="expense",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Hash of date, amount, description and payment method, used to skip duplicates",
+                max_length=64,
+                null=True,
+                unique=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="income",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Hash of date, amount, description and source, used to skip duplicates",
+                max_length=64,
+                null=True,
+                unique=True,
+            ),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:51
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def populate_balance_snapshots(apps, schema_editor):
+    BalanceSnapshot = apps.get_model("backend", "BalanceSnapshot")
+    monthly = (
+        apps.get_model("backend", "MonthlyCashflow")
+        .objects.order_by("month")
+        .values("month")
+        .annotate(income=Sum("income_total"), expense=Sum("expense_total"))
+    )
+    balance = Decimal(0)
+    snapshots = []
+    for row in monthly:
+        balance += row["income"] - row["expense"]
+        snapshots.append(BalanceSnapshot(month=row["month"], balance=balance))
+    BalanceSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("backend", "0004_transaction_fingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BalanceSnapshot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "month",
+                    models.DateField(help_text="First day of the month whose closing balance is stored", unique=True),
+                ),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        help_text="Balance after the last transaction of the month",
+                        max_digits=14,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-month"],
+            },
+        ),
+        migrations.RunPython(populate_balance_snapshots, migrations.RunPython.noop),
+    ]
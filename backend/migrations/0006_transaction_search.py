@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+# The search index as of this migration, frozen rather than imported from `backend.budget_utilities.search`.
+# The PostgreSQL expression must stay identical to `search.search_vector()` for queries to use the index.
+SEARCH_FIELDS = ("description", "notes")
+
+
+def _search_index(model):
+    return GinIndex(SearchVector(*SEARCH_FIELDS, config="english"), name=f"{model._meta.model_name}_search_idx")
+
+
+def sqlite_search_statements(table):
+    fts = f"{table}_fts"
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, description, notes) VALUES ('delete', old.id, old.description, old.notes);"
+    )
+    insert_new = f"INSERT INTO {fts}(rowid, description, notes) VALUES (new.id, new.description, new.notes);"
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"description, notes, content='{table}', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF description, notes ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    )
+
+
+def create_search_indexes(apps, schema_editor):
+    for model_name in ("Expense", "Income"):
+        model = apps.get_model("backend", model_name)
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.add_index(model, _search_index(model))
+        elif schema_editor.connection.vendor == "sqlite":
+            for statement in sqlite_search_statements(model._meta.db_table):
+                schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    for model_name in ("Expense", "Income"):
+        model = apps.get_model("backend", model_name)
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.remove_index(model, _search_index(model))
+        elif schema_editor.connection.vendor == "sqlite":
+            fts = f"{model._meta.db_table}_fts"
+            schema_editor.execute(f"DROP TABLE IF EXISTS {fts}")
+            for trigger in ("insert", "delete", "update"):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts}_{trigger}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("backend", "0005_balancesnapshot"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_ledger_state(apps, schema_editor):
+    apps.get_model("backend", "LedgerState").objects.create(pk=1)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("backend", "0006_transaction_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerState",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("version", models.PositiveBigIntegerField(default=0)),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, help_text="Time of the last write to the ledger"
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(create_ledger_state, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("backend", "0007_ledgerstate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Budget",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("month", "Monthly"), ("quarter", "Quarterly"), ("year", "Yearly")],
+                        default="month",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "limit",
+                    models.DecimalField(decimal_places=2, help_text="Maximum spending per period", max_digits=12),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        help_text="Category whose expenses are limited",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="budgets",
+                        to="backend.category",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["category__name", "period"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("category", "period"), name="unique_category_period_budget")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("backend", "0008_budget"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecurringRule",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "transaction_type",
+                    models.CharField(
+                        choices=[("expense", "Expense"), ("income", "Income")], default="expense", max_length=10
+                    ),
+                ),
+                ("description", models.CharField(help_text="Description of the created transactions", max_length=255)),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, help_text="Amount of every occurrence", max_digits=10),
+                ),
+                ("notes", models.TextField(blank=True, null=True)),
+                (
+                    "frequency",
+                    models.CharField(
+                        choices=[
+                            ("daily", "Daily"),
+                            ("weekly", "Weekly"),
+                            ("monthly", "Monthly"),
+                            ("yearly", "Yearly"),
+                        ],
+                        default="monthly",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "interval",
+                    models.PositiveSmallIntegerField(
+                        default=1, help_text="Repeat every this many days/weeks/months/years"
+                    ),
+                ),
+                (
+                    "start_date",
+                    models.DateField(default=django.utils.timezone.now, help_text="Date of the first occurrence"),
+                ),
+                ("end_date", models.DateField(blank=True, help_text="No occurrences after this date", null=True)),
+                (
+                    "materialized_through",
+                    models.DateField(
+                        blank=True, editable=False, help_text="Occurrences up to this date have been created", null=True
+                    ),
+                ),
+                ("active", models.BooleanField(default=True)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="recurring_rules",
+                        to="backend.category",
+                    ),
+                ),
+                (
+                    "payment_method",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Payment method of recurring expenses",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="recurring_rules",
+                        to="backend.paymentmethod",
+                    ),
+                ),
+                (
+                    "source",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Source of recurring incomes",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="recurring_rules",
+                        to="backend.incomesource",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["description"],
+                "constraints": [
+                    models.CheckConstraint(condition=models.Q(("interval__gte", 1)), name="recurring_rule_interval")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:23
+
+import backend.models
+import django.core.validators
+from django.db import migrations, models
+
+
+def sqlite_search_statements(table):
+    # The FTS5 table and triggers of 0006_transaction_search, frozen here as well.
+    fts = f"{table}_fts"
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, description, notes) VALUES ('delete', old.id, old.description, old.notes);"
+    )
+    insert_new = f"INSERT INTO {fts}(rowid, description, notes) VALUES (new.id, new.description, new.notes);"
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"description, notes, content='{table}', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF description, notes ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    )
+
+
+def restore_sqlite_search_triggers(apps, schema_editor):
+    # Adding a column with a default makes SQLite rebuild the transaction tables, which drops their FTS triggers.
+    if schema_editor.connection.vendor == "sqlite":
+        for model_name in ("Expense", "Income"):
+            for statement in sqlite_search_statements(apps.get_model("backend", model_name)._meta.db_table):
+                schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("backend", "0009_recurringrule"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExchangeRate",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "currency",
+                    models.CharField(
+                        help_text="ISO 4217 code of the converted currency",
+                        max_length=3,
+                        validators=[
+                            django.core.validators.RegexValidator(
+                                "^[A-Z]{3}$", "Enter a three-letter ISO 4217 code, e.g. EUR."
+                            )
+                        ],
+                    ),
+                ),
+                ("month", models.DateField(help_text="First day of the month the rate applies from")),
+                (
+                    "rate",
+                    models.DecimalField(decimal_places=8, help_text="Base currency units per unit", max_digits=18),
+                ),
+            ],
+            options={
+                "ordering": ["currency", "-month"],
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name="monthlycashflow",
+            name="unique_month_category_cashflow",
+        ),
+        migrations.AddField(
+            model_name="expense",
+            name="currency",
+            field=models.CharField(
+                default=backend.models.default_currency,
+                help_text="ISO 4217 code of the amount",
+                max_length=3,
+                validators=[
+                    django.core.validators.RegexValidator("^[A-Z]{3}$", "Enter a three-letter ISO 4217 code, e.g. EUR.")
+                ],
+            ),
+        ),
+        migrations.AddField(
+            model_name="income",
+            name="currency",
+            field=models.CharField(
+                default=backend.models.default_currency,
+                help_text="ISO 4217 code of the amount",
+                max_length=3,
+                validators=[
+                    django.core.validators.RegexValidator("^[A-Z]{3}$", "Enter a three-letter ISO 4217 code, e.g. EUR.")
+                ],
+            ),
+        ),
+        migrations.AddField(
+            model_name="monthlycashflow",
+            name="currency",
+            field=models.CharField(
+                default=backend.models.default_currency, help_text="Currency of the totals", max_length=3
+            ),
+        ),
+        migrations.AddField(
+            model_name="recurringrule",
+            name="currency",
+            field=models.CharField(
+                default=backend.models.default_currency,
+                help_text="ISO 4217 code of the amount",
+                max_length=3,
+                validators=[
+                    django.core.validators.RegexValidator("^[A-Z]{3}$", "Enter a three-letter ISO 4217 code, e.g. EUR.")
+                ],
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="monthlycashflow",
+            constraint=models.UniqueConstraint(
+                fields=("month", "category", "currency"), name="unique_month_category_cashflow"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="exchangerate",
+            constraint=models.UniqueConstraint(fields=("currency", "month"), name="unique_currency_month_rate"),
+        ),
+        migrations.RunPython(restore_sqlite_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("backend", "0010_currency"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="category",
+            name="description",
+            field=models.TextField(blank=True, help_text="Description for the category", null=True),
+        ),
+        migrations.AlterField(
+            model_name="incomesource",
+            name="description",
+            field=models.TextField(blank=True, help_text="Description for the income source", null=True),
+        ),
+        migrations.AlterField(
+            model_name="paymentmethod",
+            name="description",
+            field=models.TextField(blank=True, help_text="Description for the payment method", null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("backend", "0011_description_help_text"),
+    ]
+
+    operations = [
+        # The new indexes serve the list pages before the old ones go away.
+        migrations.AddIndex(
+            model_name="expense",
+            index=models.Index(fields=["date", "created_at", "id"], name="expense_date_created_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="income",
+            index=models.Index(fields=["date", "created_at", "id"], name="income_date_created_id_idx"),
+        ),
+        migrations.RemoveIndex(
+            model_name="expense",
+            name="expense_date_created_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="income",
+            name="income_date_created_idx",
+        ),
+    ]
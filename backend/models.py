@@ -1,10 +1,17 @@
-from django.db import models
-
-# For user authentication
-# from django.conf import settings
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import RegexValidator
+from django.db import models, router, transaction
 from django.utils import timezone
 
 
+currency_code_validator = RegexValidator(r"^[A-Z]{3}$", "Enter a three-letter ISO 4217 code, e.g. EUR.")
+
+
+def default_currency() -> str:
+    return settings.BASE_CURRENCY
+
+
 class Category(models.Model):
     """
     Represents a category for transactions (both income and expense).
@@ -58,15 +65,46 @@ class IncomeSource(models.Model):
         return self.name
 
 
-class Expense(models.Model):
+class TransactionQuerySet(models.QuerySet):
+    def with_related(self):
+        """
+        Fetch the category and the payment method/source in the same joined query.
+        """
+        return self.select_related("category", self.model.counterparty_field)
+
+
+class AtomicLedgerWriteMixin:
+    """
+    Runs saves and deletes in one transaction with the signal handlers that fold them into the rollup, the balance
+    checkpoints and the ledger version, so a failure in any of them leaves none of the write applied.
+    """
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using") or router.db_for_write(type(self), instance=self)):
+            super().save(*args, **kwargs)
+
+    def delete(self, using=None, keep_parents=False):
+        with transaction.atomic(using=using or router.db_for_write(type(self), instance=self)):
+            return super().delete(using=using, keep_parents=keep_parents)
+
+
+class Expense(AtomicLedgerWriteMixin, models.Model):
     """
     Represents an expense transaction.
     """
 
+    counterparty_field = "payment_method"
+
     # For user authentication:
     # user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="expenses")
     description = models.CharField(max_length=255, help_text="Brief description of the expense")
     amount = models.DecimalField(max_digits=10, decimal_places=2, help_text="Amount spent")
+    currency = models.CharField(
+        max_length=3,
+        default=default_currency,
+        validators=[currency_code_validator],
+        help_text="ISO 4217 code of the amount",
+    )
     date = models.DateField(default=timezone.now, help_text="Date of the expense")
     category = models.ForeignKey(
         Category,
@@ -85,25 +123,48 @@ class Expense(models.Model):
         help_text="How this expense was paid",
     )
     notes = models.TextField(blank=True, null=True, help_text="Additional notes for the expense")
+    fingerprint = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Hash of date, amount, description and payment method, used to skip duplicates",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TransactionQuerySet.as_manager()
+
     class Meta:
         ordering = ["-date", "-created_at"]  # Show newest expenses first
+        indexes = [
+            models.Index(fields=["date", "created_at", "id"], name="expense_date_created_id_idx"),
+            models.Index(fields=["category", "date"], name="expense_category_date_idx"),
+            models.Index(fields=["payment_method", "date"], name="expense_payment_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.description} - {self.amount} on {self.date.strftime('%Y-%m-%d')}"
 
 
-class Income(models.Model):
+class Income(AtomicLedgerWriteMixin, models.Model):
     """
     Represents an income transaction.
     """
 
+    counterparty_field = "source"
+
     # For user authentication:
     # user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="incomes")
     description = models.CharField(max_length=255, help_text="Brief description of the income")
     amount = models.DecimalField(max_digits=10, decimal_places=2, help_text="Amount received")
+    currency = models.CharField(
+        max_length=3,
+        default=default_currency,
+        validators=[currency_code_validator],
+        help_text="ISO 4217 code of the amount",
+    )
     date = models.DateField(default=timezone.now, help_text="Date the income was received")
     category = models.ForeignKey(
         Category,
@@ -122,11 +183,212 @@ class Income(models.Model):
         help_text="Source of this income",
     )
     notes = models.TextField(blank=True, null=True, help_text="Additional notes for the income")
+    fingerprint = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Hash of date, amount, description and source, used to skip duplicates",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TransactionQuerySet.as_manager()
+
     class Meta:
         ordering = ["-date", "-created_at"]  # Show newest incomes first
+        indexes = [
+            models.Index(fields=["date", "created_at", "id"], name="income_date_created_id_idx"),
+            models.Index(fields=["category", "date"], name="income_category_date_idx"),
+            models.Index(fields=["source", "date"], name="income_source_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.description} - {self.amount} on {self.date.strftime('%Y-%m-%d')}"
+
+
+class MonthlyCashflow(models.Model):
+    """
+    Materialized per-month, per-category totals of expenses and incomes, one row per currency.
+    Kept up to date incrementally by the transaction signals and rebuilt by the `rebuild_cashflow` command.
+    """
+
+    month = models.DateField(help_text="First day of the month the totals belong to")
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="monthly_cashflows",
+        help_text="Category of the aggregated transactions",
+    )
+    currency = models.CharField(max_length=3, default=default_currency, help_text="Currency of the totals")
+    expense_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense_count = models.PositiveIntegerField(default=0)
+    income_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    income_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-month"]
+        constraints = [
+            models.UniqueConstraint(fields=["month", "category", "currency"], name="unique_month_category_cashflow")
+        ]
+
+    def __str__(self):
+        return f"{self.category or 'Uncategorized'} - {self.month.strftime('%Y-%m')} ({self.currency})"
+
+
+class ExchangeRate(models.Model):
+    """
+    Value of one unit of a currency in the base currency (`settings.BASE_CURRENCY`) during a month.
+    Amounts are converted at their month's rate, or the latest earlier one; months before the first known rate use
+    that first rate. Loaded from CSV by the `load_exchange_rates` command.
+    """
+
+    currency = models.CharField(
+        max_length=3, validators=[currency_code_validator], help_text="ISO 4217 code of the converted currency"
+    )
+    month = models.DateField(help_text="First day of the month the rate applies from")
+    rate = models.DecimalField(max_digits=18, decimal_places=8, help_text="Base currency units per unit")
+
+    class Meta:
+        ordering = ["currency", "-month"]
+        constraints = [models.UniqueConstraint(fields=["currency", "month"], name="unique_currency_month_rate")]
+
+    def __str__(self):
+        return f"{self.currency} {self.month.strftime('%Y-%m')}: {self.rate}"
+
+    def clean(self):
+        if self.month and self.month.day != 1:
+            raise ValidationError({"month": "Rates apply to whole months; use the first day of the month."})
+        if self.currency == settings.BASE_CURRENCY:
+            raise ValidationError({"currency": "Amounts in the base currency are not converted."})
+
+
+class BalanceSnapshot(models.Model):
+    """
+    Cumulative balance (all incomes minus all expenses) at the end of a month.
+    Checkpoints for running balances, kept up to date alongside `MonthlyCashflow`.
+    """
+
+    month = models.DateField(unique=True, help_text="First day of the month whose closing balance is stored")
+    balance = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, help_text="Balance after the last transaction of the month"
+    )
+
+    class Meta:
+        ordering = ["-month"]
+
+    def __str__(self):
+        return f"{self.month.strftime('%Y-%m')}: {self.balance}"
+
+
+class Budget(models.Model):
+    """
+    Spending limit of a category over a calendar month, quarter or year.
+    Evaluated against the `MonthlyCashflow` rollup, so it covers whole months only.
+    """
+
+    class Period(models.TextChoices):
+        MONTH = "month", "Monthly"
+        QUARTER = "quarter", "Quarterly"
+        YEAR = "year", "Yearly"
+
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="budgets", help_text="Category whose expenses are limited"
+    )
+    period = models.CharField(max_length=10, choices=Period.choices, default=Period.MONTH)
+    limit = models.DecimalField(max_digits=12, decimal_places=2, help_text="Maximum spending per period")
+
+    class Meta:
+        ordering = ["category__name", "period"]
+        constraints = [models.UniqueConstraint(fields=["category", "period"], name="unique_category_period_budget")]
+
+    def __str__(self):
+        return f"{self.category.name} - {self.get_period_display()}: {self.limit}"
+
+
+class RecurringRule(models.Model):
+    """
+    A transaction that repeats, such as rent, salary or a subscription. The schedule follows an RFC 5545 RRULE
+    subset: every `interval` days, weeks, months or years from `start_date`, until the optional `end_date`.
+    Monthly and yearly occurrences on a day the month lacks (e.g. the 31st) fall on its last day.
+    The `materialize_recurring` command creates the occurrences, recording how far it got in `materialized_through`.
+    """
+
+    class TransactionType(models.TextChoices):
+        EXPENSE = "expense", "Expense"
+        INCOME = "income", "Income"
+
+    class Frequency(models.TextChoices):
+        DAILY = "daily", "Daily"
+        WEEKLY = "weekly", "Weekly"
+        MONTHLY = "monthly", "Monthly"
+        YEARLY = "yearly", "Yearly"
+
+    transaction_type = models.CharField(max_length=10, choices=TransactionType.choices, default=TransactionType.EXPENSE)
+    description = models.CharField(max_length=255, help_text="Description of the created transactions")
+    amount = models.DecimalField(max_digits=10, decimal_places=2, help_text="Amount of every occurrence")
+    currency = models.CharField(
+        max_length=3,
+        default=default_currency,
+        validators=[currency_code_validator],
+        help_text="ISO 4217 code of the amount",
+    )
+    category = models.ForeignKey(
+        Category, on_delete=models.SET_NULL, null=True, blank=True, related_name="recurring_rules"
+    )
+    payment_method = models.ForeignKey(
+        PaymentMethod,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="recurring_rules",
+        help_text="Payment method of recurring expenses",
+    )
+    source = models.ForeignKey(
+        IncomeSource,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="recurring_rules",
+        help_text="Source of recurring incomes",
+    )
+    notes = models.TextField(blank=True, null=True)
+    frequency = models.CharField(max_length=10, choices=Frequency.choices, default=Frequency.MONTHLY)
+    interval = models.PositiveSmallIntegerField(default=1, help_text="Repeat every this many days/weeks/months/years")
+    start_date = models.DateField(default=timezone.now, help_text="Date of the first occurrence")
+    end_date = models.DateField(null=True, blank=True, help_text="No occurrences after this date")
+    materialized_through = models.DateField(
+        null=True, blank=True, editable=False, help_text="Occurrences up to this date have been created"
+    )
+    active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ["description"]
+        constraints = [models.CheckConstraint(condition=models.Q(interval__gte=1), name="recurring_rule_interval")]
+
+    def __str__(self):
+        return f"{self.description} ({self.get_frequency_display().lower()})"
+
+    def clean(self):
+        if self.transaction_type == self.TransactionType.EXPENSE and self.source_id:
+            raise ValidationError({"source": "Recurring expenses have a payment method, not a source."})
+        if self.transaction_type == self.TransactionType.INCOME and self.payment_method_id:
+            raise ValidationError({"payment_method": "Recurring incomes have a source, not a payment method."})
+        if self.end_date and self.end_date < self.start_date:
+            raise ValidationError({"end_date": "The end date is before the start date."})
+
+
+class LedgerState(models.Model):
+    """
+    Single row whose version is bumped by every write to the ledger or its reference data.
+    Cached pages are validated against it (ETag/Last-Modified) with one primary-key lookup.
+    """
+
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now, help_text="Time of the last write to the ledger")
+
+    def __str__(self):
+        return f"Ledger version {self.version}"
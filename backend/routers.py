@@ -0,0 +1,86 @@
+import functools
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+PRIMARY_DATABASE = "default"
+
+# The database the reads of the current request or block go to; None for the primary.
+_read_database: ContextVar[str | None] = ContextVar("read_database", default=None)
+
+
+@contextmanager
+def read_from_replicas(enabled: bool = True):
+    """
+    Route the reads made inside the block to one replica, picked at random and kept for the whole block (or, with
+    `enabled=False`, back to the primary). Nested blocks keep the replica already picked, so every read of a request
+    sees the same replication position. Context variables follow the code into `sync_to_async` threads and async
+    tasks.
+    """
+    current = _read_database.get()
+    if not enabled or not settings.REPLICA_DATABASES:
+        database = None
+    elif current in settings.REPLICA_DATABASES:
+        database = current
+    else:
+        database = random.choice(settings.REPLICA_DATABASES)
+    token = _read_database.set(database)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+def replica_reads(view):
+    """
+    Send the reads of a read-only view to the replicas, unless the client has just written and is pinned to the
+    primary by `PrimaryStickinessMiddleware`. Works on sync and async views.
+    """
+    if iscoroutinefunction(view):
+
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            with read_from_replicas(not getattr(request, "read_from_primary", False)):
+                return await view(request, *args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with read_from_replicas(not getattr(request, "read_from_primary", False)):
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaReadsMixin:
+    """
+    Class-based view counterpart of `replica_reads`.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return replica_reads(super().as_view(**initkwargs))
+
+
+class ReplicaRouter:
+    """
+    Writes, migrations and ordinary reads go to the primary. Reads made inside `read_from_replicas()` go to the
+    alias of `REPLICA_DATABASES` it picked, which are expected to replicate the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get() or PRIMARY_DATABASE
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.REPLICA_DATABASES
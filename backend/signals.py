@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from backend.budget_utilities.balance import rebuild_balance_snapshots
+from backend.budget_utilities.caching import invalidate_dashboard_cache
+from backend.budget_utilities.currency import rate_cache
+from backend.budget_utilities.dedupe import assign_fingerprint
+from backend.budget_utilities.rollup import add_transactions_to_rollup, merge_uncategorized_rollup
+from backend.models import Budget, Category, ExchangeRate, Expense, Income, IncomeSource, PaymentMethod
+
+
+@receiver(pre_save, sender=Expense)
+@receiver(pre_save, sender=Income)
+def remember_previous_rollup_state(sender, instance, raw=False, **kwargs):
+    """
+    Keep the stored month, category, currency and amount of an edited transaction, so that `post_save` can move it in
+    the rollup.
+    """
+    instance._rollup_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_previous = (
+        sender.objects.filter(pk=instance.pk).values_list("date", "category_id", "currency", "amount").first()
+    )
+
+
+@receiver(pre_save, sender=Expense)
+@receiver(pre_save, sender=Income)
+def fingerprint_transaction(sender, instance, raw=False, **kwargs):
+    if not raw:
+        assign_fingerprint(instance)
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=Income)
+def update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_rollup_previous", None)
+    if previous is not None:
+        date, category_id, currency, amount = previous
+        add_transactions_to_rollup(
+            sender, [sender(date=date, category_id=category_id, currency=currency, amount=amount)], sign=-1
+        )
+    add_transactions_to_rollup(sender, [instance])
+
+
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Income)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    add_transactions_to_rollup(sender, [instance], sign=-1)
+
+
+@receiver(post_delete, sender=Category)
+def merge_rollup_on_category_delete(sender, instance, **kwargs):
+    merge_uncategorized_rollup()
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def reconvert_balances_on_rate_change(sender, **kwargs):
+    """
+    The checkpoints hold converted amounts, so a changed rate recomputes them; the rendering cache re-reads the rates.
+    """
+    rebuild_balance_snapshots()
+    transaction.on_commit(rate_cache.clear)
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=Income)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=PaymentMethod)
+@receiver(post_save, sender=IncomeSource)
+@receiver(post_save, sender=Budget)
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=PaymentMethod)
+@receiver(post_delete, sender=IncomeSource)
+@receiver(post_delete, sender=Budget)
+@receiver(post_delete, sender=ExchangeRate)
+def invalidate_cached_dashboard(sender, **kwargs):
+    invalidate_dashboard_cache()
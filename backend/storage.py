@@ -0,0 +1,50 @@
+import gzip
+from collections.abc import Callable
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional: only `.gz` files are written without it.
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".map", ".svg", ".txt", ".json", ".xml", ".html")
+
+
+def _compressors() -> dict[str, Callable[[bytes], bytes]]:
+    compressors = {".gz": lambda content: gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressors[".br"] = lambda content: brotli.compress(content, quality=11)
+    return compressors
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    `ManifestStaticFilesStorage` that also writes a `.gz` (and, with `brotli` installed, a `.br`) copy of every
+    hashed text asset during `collectstatic`, for the front-end server to send pre-compressed
+    (e.g. nginx `gzip_static on; brotli_static on;`). Copies that would not be smaller are skipped.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if not isinstance(processed, Exception) and hashed_name:
+                hashed_names.add(hashed_name)
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_names):
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(hashed_name)
+
+    def compress(self, name: str) -> None:
+        with self.open(name) as original:
+            content = original.read()
+        for suffix, compress in _compressors().items():
+            compressed = compress(content)
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
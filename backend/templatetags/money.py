@@ -0,0 +1,38 @@
+from django import template
+from django.conf import settings
+from django.template.defaultfilters import floatformat
+
+from backend.budget_utilities.currency import rate_cache
+
+register = template.Library()
+
+# Currencies written with a symbol before the amount; the others get their code after it.
+CURRENCY_SYMBOLS = {"USD": "$", "EUR": "€", "GBP": "£", "JPY": "¥"}
+
+
+@register.filter
+def money(amount, currency=""):
+    """
+    `{{ expense.amount|money:expense.currency }}` renders "€12.50", "-€12.50" or "12.50 PLN". Amounts without a
+    currency, such as totals, are in the base currency. Empty for a missing amount.
+    """
+    if amount is None or amount == "":
+        return ""
+    currency = currency or settings.BASE_CURRENCY
+    formatted = floatformat(amount, 2)
+    sign, formatted = ("-", formatted[1:]) if formatted.startswith("-") else ("", formatted)
+    symbol = CURRENCY_SYMBOLS.get(currency)
+    return f"{sign}{symbol}{formatted}" if symbol else f"{sign}{formatted} {currency}"
+
+
+@register.filter
+def in_base_currency(item):
+    """
+    A foreign-currency transaction's amount in the base currency ("≈ $13.10"), converted with the per-process rate
+    cache. Empty for base-currency amounts and currencies without a rate. Reads the rates on a cold cache, so use it
+    in templates rendered off the event loop (`TemplateResponse` or sync views).
+    """
+    if item.currency == settings.BASE_CURRENCY:
+        return ""
+    converted = rate_cache.get().convert(item.amount, item.currency, item.date)
+    return "" if converted is None else f"≈ {money(converted)}"
@@ -1,3 +1,1046 @@
-from django.test import TestCase  # noqa
+import csv
+import datetime
+import importlib
+import json
+import tempfile
+import time
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, router
+from django.db.models import Sum
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from backend.budget_utilities.balance import attach_running_balances, get_balance_at, rebuild_balance_snapshots
+from backend.budget_utilities.budgets import get_budget_statuses, period_bounds
+from backend.budget_utilities.caching import dashboard_cache_key
+from backend.budget_utilities.cashflow import get_cashflow_summary
+from backend.budget_utilities.bulk_edit import merge_records, reassign_counterparty, recategorize
+from backend.budget_utilities.currency import currencies_without_rates, rate_cache
+from backend.budget_utilities.forecasting import (
+    build_forecast,
+    forecast_series,
+    holt_forecast,
+    load_monthly_totals,
+    seasonal_indices,
+)
+from backend.budget_utilities.freshness import get_ledger_version
+from backend.budget_utilities.recurring import materialize_recurring, occurrence_dates
+from backend.budget_utilities.pagination import KEYSET_ORDERING, decode_cursor, encode_cursor, paginate_keyset
+from backend.budget_utilities.reporting import build_report
+from backend.budget_utilities.rollup import get_rollup_total, rebuild_rollup
+from backend.budget_utilities.search import search_filter
+from backend.routers import read_from_replicas, replica_reads
+from backend import views
+from backend.middleware import PRIMARY_STICKY_COOKIE, PerformanceMiddleware
+from backend.models import (
+    BalanceSnapshot,
+    Budget,
+    Category,
+    ExchangeRate,
+    Expense,
+    Income,
+    IncomeSource,
+    MonthlyCashflow,
+    PaymentMethod,
+    RecurringRule,
+)
+from personal_budget_tracker import settings as project_settings
+
+
+class TransactionIndexTests(TestCase):
+    """
+    The list and detail access paths must be served by the composite indexes, not by a full sort.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Groceries")
+        cls.payment_method = PaymentMethod.objects.create(name="Cash")
+        cls.source = IncomeSource.objects.create(name="Employer")
+        Expense.objects.bulk_create(
+            Expense(description=f"Expense {i}", amount=i, category=cls.category, payment_method=cls.payment_method)
+            for i in range(50)
+        )
+        Income.objects.bulk_create(
+            Income(description=f"Income {i}", amount=i, category=cls.category, source=cls.source) for i in range(50)
+        )
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # The tables are tiny, so make the planner prove the indexes are usable.
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+        elif connection.vendor != "sqlite":
+            self.skipTest(f"No EXPLAIN expectations for {connection.vendor}")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_expense_list_uses_date_index(self):
+        self.assertUsesIndex(Expense.objects.all()[:10], "expense_date_created_id_idx")
+
+    def test_income_list_uses_date_index(self):
+        self.assertUsesIndex(Income.objects.all()[:10], "income_date_created_id_idx")
+
+    def test_category_detail_uses_category_date_index(self):
+        self.assertUsesIndex(self.category.expenses.order_by("-date")[:10], "expense_category_date_idx")
+        self.assertUsesIndex(self.category.incomes.order_by("-date")[:10], "income_category_date_idx")
+
+    def test_payment_method_and_source_use_date_indexes(self):
+        self.assertUsesIndex(self.payment_method.expenses.order_by("-date")[:10], "expense_payment_date_idx")
+        self.assertUsesIndex(self.source.incomes.order_by("-date")[:10], "income_source_date_idx")
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Cursor pages must visit every row exactly once in `(date, created_at, id)` order, in both directions.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Expense.objects.bulk_create(
+            Expense(description=f"Expense {i}", amount=i, date=datetime.date(2025, 1, 1 + i // 4)) for i in range(11)
+        )
+        # Rows sharing a date also share `created_at`, so only the id orders them.
+        for date in Expense.objects.values_list("date", flat=True).distinct():
+            Expense.objects.filter(date=date).update(created_at=datetime.datetime(2025, 2, 1, tzinfo=datetime.UTC))
+        cls.ordered = list(Expense.objects.order_by(*KEYSET_ORDERING).values_list("pk", flat=True))
+
+    def pages_forward(self, per_page):
+        pages, cursor = [], None
+        while True:
+            page = paginate_keyset(Expense.objects.all(), per_page, after=cursor)
+            pages.append([row.pk for row in page])
+            if not page.has_next():
+                return pages, page
+            cursor = page.next_cursor
+
+    def test_next_and_previous_traversal(self):
+        pages, last = self.pages_forward(3)
+        self.assertEqual([pk for page in pages for pk in page], self.ordered)
+        self.assertEqual([len(page) for page in pages], [3, 3, 3, 2])
+        self.assertTrue(last.has_previous())
+
+        backwards, page = [], last
+        while page.has_previous():
+            page = paginate_keyset(Expense.objects.all(), 3, before=page.previous_cursor)
+            backwards.append([row.pk for row in page])
+        self.assertEqual(backwards, pages[-2::-1])
+        self.assertFalse(page.has_previous())
+        self.assertEqual(page.next_cursor, encode_cursor(Expense.objects.get(pk=pages[0][-1])))
+
+    def test_rows_tied_on_date_and_created_at(self):
+        for per_page in (1, 2, 4):
+            with self.subTest(per_page=per_page):
+                pages, _ = self.pages_forward(per_page)
+                self.assertEqual([pk for page in pages for pk in page], self.ordered)
+
+    def test_malformed_cursors(self):
+        for cursor in ("not-base64!", "bm90IGpzb24", encode_cursor(Expense.objects.first())[:-4], "WzFd", "bnVsbA"):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValueError):
+                    decode_cursor(cursor)
+                with self.assertRaises(ValueError):
+                    paginate_keyset(Expense.objects.all(), 3, after=cursor)
+        response = self.client.get(reverse("backend:expense_list"), {"after": "WzFd"})
+        self.assertEqual(response.status_code, 404)
+
+
+class ListingQueryCountTests(TestCase):
+    """
+    Listing pages must cost a fixed number of queries, however many rows they render.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Groceries")
+        cls.payment_method = PaymentMethod.objects.create(name="Cash")
+        cls.source = IncomeSource.objects.create(name="Employer")
+
+    def setUp(self):
+        cache.clear()
+
+    def add_transactions(self, count):
+        for i in range(count):
+            Expense.objects.create(
+                description=f"Expense {i}", amount=i, category=self.category, payment_method=self.payment_method
+            )
+            Income.objects.create(description=f"Income {i}", amount=i, category=self.category, source=self.source)
+
+    def assertConstantQueries(self, url, num_queries):
+        for rows in (1, 10):
+            self.add_transactions(rows)
+            cache.clear()
+            with self.subTest(rows=rows), self.assertNumQueries(num_queries):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_home(self):
+        self.assertConstantQueries(reverse("backend:home"), 11)
+
+    def test_repeated_home_is_served_from_cache(self):
+        self.add_transactions(3)
+        self.client.get(reverse("backend:home"))
+        # Only the ledger version lookup, which both validates the page and keys the cache.
+        with self.assertNumQueries(1):
+            self.client.get(reverse("backend:home"))
+
+    def test_home_cache_is_invalidated_by_writes(self):
+        self.client.get(reverse("backend:home"))
+        with self.captureOnCommitCallbacks(execute=True):
+            Expense.objects.create(description="Late expense", amount=1)
+        response = self.client.get(reverse("backend:home"))
+        self.assertContains(response, "Late expense")
+
+    def test_home_cache_filled_from_before_a_write_is_not_served(self):
+        stale_version, stale_summary = get_ledger_version(), get_cashflow_summary()
+        Expense.objects.create(description="Late expense", amount=1)
+        # A request that read the ledger before the write only stores its summary after the write has committed.
+        cache.set(dashboard_cache_key(stale_version, timezone.localdate()), {**stale_summary, "budgets": []})
+        self.assertContains(self.client.get(reverse("backend:home")), "Late expense")
+
+    def test_expense_list(self):
+        self.assertConstantQueries(reverse("backend:expense_list"), 5)
+
+    def test_expense_list_offset_pagination(self):
+        self.assertConstantQueries(reverse("backend:expense_list") + "?page=1", 6)
+
+    def test_category_detail(self):
+        self.assertConstantQueries(reverse("backend:category_detail", args=[self.category.pk]), 6)
+
+
+class ConditionalGetTests(TestCase):
+    """
+    Pages must answer `304 Not Modified` from the ledger version alone, and change their ETag on every write.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Groceries")
+        Expense.objects.create(description="Coffee", amount=3, category=cls.category)
+
+    def assertRevalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, headers={"if-none-match": etag}).status_code, 304)
+        Expense.objects.create(description="Tea", amount=2, category=self.category)
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_pages_revalidate_against_ledger_version(self):
+        for url in (
+            reverse("backend:home"),
+            reverse("backend:expense_list"),
+            reverse("backend:category_list"),
+            reverse("backend:category_detail", args=[self.category.pk]),
+        ):
+            with self.subTest(url=url):
+                self.assertRevalidates(url)
+
+    def test_no_last_modified(self):
+        # It only has whole-second resolution, so a write in the same second would not invalidate it.
+        response = self.client.get(reverse("backend:expense_list"))
+        self.assertNotIn("Last-Modified", response)
+        Expense.objects.create(description="Same second", amount=1)
+        response = self.client.get(
+            reverse("backend:expense_list"), headers={"if-modified-since": http_date(time.time() + 60)}
+        )
+        self.assertContains(response, "Same second")
+
+
+class AdminChangelistTests(TestCase):
+    """
+    The transaction changelists must cost a fixed number of queries and never scan the table for their filters.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "password")
+        category = Category.objects.create(name="Groceries")
+        payment_method = PaymentMethod.objects.create(name="Cash")
+        for day in (1, 15, 40, 80):
+            Expense.objects.create(
+                description=f"Day {day}",
+                amount=day,
+                date=datetime.date(2025, 1, 1) + datetime.timedelta(days=day),
+                category=category,
+                payment_method=payment_method,
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_changelist_queries(self):
+        # Session, user, rollup months, the two related filters, the count, the rows with their relations and the
+        # two choice lists of the bulk edit action bar.
+        with self.assertNumQueries(9):
+            response = self.client.get(reverse("admin:backend_expense_changelist"))
+        self.assertContains(response, "February 2025")
+        self.assertContains(response, "Day 80")
+
+    def test_month_filter(self):
+        response = self.client.get(reverse("admin:backend_expense_changelist"), {"month": "2025-01"})
+        self.assertContains(response, "Day 15")
+        self.assertNotContains(response, "Day 40")
+
+
+class MonthlyCashflowRollupTests(TestCase):
+    """
+    The rollup kept up to date by the signals must always equal a full rebuild from the ledger.
+    """
+
+    def setUp(self):
+        self.groceries, self.travel = (Category.objects.create(name=name) for name in ("Groceries", "Travel"))
+        for month in (1, 2, 3):
+            Expense.objects.create(
+                description=f"Shop {month}",
+                amount=10 * month,
+                date=datetime.date(2025, month, 5),
+                category=self.groceries,
+            )
+            Income.objects.create(description=f"Salary {month}", amount=1000, date=datetime.date(2025, month, 1))
+
+    def rollup(self):
+        return list(
+            MonthlyCashflow.objects.exclude(expense_count=0, income_count=0)
+            .order_by("month", "category_id", "currency")
+            .values_list(
+                "month", "category_id", "currency", "expense_total", "expense_count", "income_total", "income_count"
+            )
+        )
+
+    def assertRollupMatchesRebuild(self):
+        incremental = self.rollup()
+        rebuild_rollup()
+        self.assertEqual(incremental, self.rollup())
+
+    def test_totals(self):
+        self.assertEqual(get_rollup_total(Expense), Decimal(60))
+        self.assertEqual(get_rollup_total(Income), Decimal(3000))
+        self.assertRollupMatchesRebuild()
+
+    def test_edit_moves_month_category_and_amount(self):
+        expense = Expense.objects.get(description="Shop 1")
+        expense.date = datetime.date(2025, 4, 2)
+        expense.category = self.travel
+        expense.amount = 75
+        expense.save()
+        row = MonthlyCashflow.objects.get(month=datetime.date(2025, 4, 1), category=self.travel)
+        self.assertEqual((row.expense_total, row.expense_count), (Decimal(75), 1))
+        self.assertEqual(get_rollup_total(Expense), Decimal(125))
+        self.assertRollupMatchesRebuild()
+
+    def test_deletes(self):
+        Expense.objects.get(description="Shop 2").delete()
+        self.groceries.delete()
+        self.assertEqual(
+            MonthlyCashflow.objects.filter(category__isnull=True, month=datetime.date(2025, 1, 1)).count(), 1
+        )
+        self.assertEqual(get_rollup_total(Expense), Decimal(40))
+        self.assertRollupMatchesRebuild()
+
+    def test_failed_rollup_update_rolls_back_the_write(self):
+        with mock.patch("backend.signals.add_transactions_to_rollup", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                Expense.objects.create(description="Lost", amount=5, date=datetime.date(2025, 1, 9))
+            expense = Expense.objects.get(description="Shop 3")
+            expense.amount = 99
+            with self.assertRaises(DatabaseError):
+                expense.save()
+        self.assertFalse(Expense.objects.filter(description="Lost").exists())
+        self.assertEqual(Expense.objects.get(description="Shop 3").amount, Decimal(30))
+        self.assertRollupMatchesRebuild()
+
+
+class BalanceSnapshotTests(TestCase):
+    """
+    Checkpoints must stay equal to a full recomputation, and running balances to a plain cumulative sum.
+    """
+
+    def setUp(self):
+        for month in (1, 2, 3, 5):
+            Income.objects.create(description=f"Salary {month}", amount=1000, date=datetime.date(2025, month, 1))
+            Expense.objects.create(description=f"Rent {month}", amount=600, date=datetime.date(2025, month, 3))
+            Expense.objects.create(description=f"Food {month}", amount=50, date=datetime.date(2025, month, 20))
+
+    def snapshots(self):
+        return list(BalanceSnapshot.objects.order_by("month").values_list("month", "balance"))
+
+    def assertSnapshotsMatchRebuild(self):
+        incremental = self.snapshots()
+        rebuild_balance_snapshots()
+        self.assertEqual(incremental, self.snapshots())
+
+    def test_backdated_edit_shifts_later_checkpoints(self):
+        expense = Expense.objects.get(description="Food 5")
+        expense.date = datetime.date(2025, 1, 25)
+        expense.amount = 80
+        expense.save()
+        self.assertSnapshotsMatchRebuild()
+        self.assertEqual(BalanceSnapshot.objects.get(month=datetime.date(2025, 1, 1)).balance, Decimal("270.00"))
+
+    def test_new_month_and_delete(self):
+        Expense.objects.create(description="Trip", amount=200, date=datetime.date(2025, 4, 10))
+        Income.objects.get(description="Salary 2").delete()
+        self.assertSnapshotsMatchRebuild()
+
+    def test_running_balance_matches_cumulative_sum(self):
+        balance = Decimal(0)
+        expected = {}
+        entries = [(item.date, item.created_at, 0, item.pk, -item.amount) for item in Expense.objects.all()]
+        entries += [(item.date, item.created_at, 1, item.pk, item.amount) for item in Income.objects.all()]
+        for _, _, kind, pk, amount in sorted(entries):
+            balance += amount
+            expected[kind, pk] = balance
+
+        # A page spanning months, and one starting mid-month after an income of the same month.
+        for date_from, date_to in (
+            (datetime.date(2025, 3, 1), None),
+            (datetime.date(2025, 2, 20), datetime.date(2025, 3, 3)),
+        ):
+            expenses = list(Expense.objects.filter(date__gte=date_from, date__lte=date_to or datetime.date.max))
+            with self.subTest(date_from=date_from), self.assertNumQueries(3):
+                attach_running_balances(expenses)
+            for expense in expenses:
+                self.assertEqual(expense.running_balance, expected[0, expense.pk])
+        self.assertEqual(get_balance_at(datetime.date(2025, 3, 10)), Decimal("1100.00"))
+
+
+class BudgetTests(TestCase):
+    """
+    Every budget must be evaluated from the rollup in a single query, whatever the number of budgets.
+    """
+
+    today = datetime.date(2025, 5, 20)
+
+    def test_period_bounds(self):
+        self.assertEqual(
+            period_bounds(Budget.Period.MONTH, self.today), (datetime.date(2025, 5, 1), datetime.date(2025, 6, 1))
+        )
+        self.assertEqual(
+            period_bounds(Budget.Period.QUARTER, self.today), (datetime.date(2025, 4, 1), datetime.date(2025, 7, 1))
+        )
+        self.assertEqual(
+            period_bounds(Budget.Period.YEAR, datetime.date(2025, 12, 31)),
+            (datetime.date(2025, 1, 1), datetime.date(2026, 1, 1)),
+        )
+
+    def test_statuses(self):
+        groceries, rent, travel = (Category.objects.create(name=name) for name in ("Groceries", "Rent", "Travel"))
+        for amount, date, category in (
+            (30, datetime.date(2025, 5, 2), groceries),
+            (50, datetime.date(2025, 4, 28), groceries),
+            (90, datetime.date(2025, 5, 3), groceries),
+            (1200, datetime.date(2025, 5, 1), rent),
+            (10, datetime.date(2025, 6, 1), groceries),
+        ):
+            Expense.objects.create(description="Expense", amount=amount, date=date, category=category)
+        Budget.objects.create(category=groceries, period=Budget.Period.MONTH, limit=150)
+        Budget.objects.create(category=groceries, period=Budget.Period.QUARTER, limit=500)
+        Budget.objects.create(category=rent, period=Budget.Period.MONTH, limit=1000)
+        Budget.objects.create(category=travel, period=Budget.Period.YEAR, limit=2000)
+
+        with self.assertNumQueries(1):
+            statuses = {
+                (status.budget.category.name, status.budget.period): status
+                for status in get_budget_statuses(self.today)
+            }
+        self.assertEqual(statuses["Groceries", "month"].spent, Decimal(120))
+        self.assertEqual(statuses["Groceries", "quarter"].spent, Decimal(180))
+        self.assertEqual(statuses["Travel", "year"].spent, Decimal(0))
+        self.assertTrue(statuses["Rent", "month"].over_budget)
+        self.assertEqual(statuses["Rent", "month"].remaining, Decimal(-200))
+        self.assertFalse(statuses["Groceries", "month"].over_budget)
+
+
+class BulkEditTests(TestCase):
+    """
+    Bulk edits must leave the rollup, fingerprints and timestamps as per-object saves would.
+    """
+
+    def setUp(self):
+        self.groceries, self.food = (Category.objects.create(name=name) for name in ("Groceries", "Food"))
+        self.cash, self.card = (PaymentMethod.objects.create(name=name) for name in ("Cash", "Card"))
+        for month in (1, 2, 3):
+            for category, payment_method in ((self.groceries, self.cash), (self.food, self.card)):
+                Expense.objects.create(
+                    description="Shop",
+                    amount=10 * month,
+                    date=datetime.date(2025, month, 5),
+                    category=category,
+                    payment_method=payment_method,
+                )
+
+    def rollup(self):
+        return set(
+            MonthlyCashflow.objects.exclude(expense_count=0, income_count=0).values_list(
+                "month", "category_id", "expense_total", "expense_count"
+            )
+        )
+
+    def assertRollupMatchesRebuild(self):
+        incremental = self.rollup()
+        rebuild_rollup()
+        self.assertEqual(incremental, self.rollup())
+
+    def test_recategorize(self):
+        before = Expense.objects.filter(category=self.food).latest("updated_at").updated_at
+        self.assertEqual(recategorize(Expense.objects.filter(category=self.food), self.groceries), 3)
+        self.assertFalse(Expense.objects.filter(category=self.food).exists())
+        self.assertGreater(Expense.objects.latest("updated_at").updated_at, before)
+        self.assertRollupMatchesRebuild()
+
+    def test_reassign_counterparty_refreshes_fingerprints(self):
+        self.assertEqual(reassign_counterparty(Expense.objects.filter(payment_method=self.card), self.cash), 3)
+        fingerprints = list(Expense.objects.values_list("fingerprint", flat=True))
+        self.assertNotIn(None, fingerprints)
+        self.assertEqual(len(set(fingerprints)), len(fingerprints))
+        expense = Expense.objects.first()
+        stored = expense.fingerprint
+        expense.save()
+        self.assertEqual(expense.fingerprint, stored)
+
+    def test_merge_categories(self):
+        Budget.objects.create(category=self.food, period=Budget.Period.MONTH, limit=100)
+        self.assertEqual(merge_records(self.groceries, [self.food]), 3)
+        self.assertFalse(Category.objects.filter(pk=self.food.pk).exists())
+        self.assertEqual(self.groceries.budgets.count(), 1)
+        self.assertEqual(self.groceries.expenses.count(), 6)
+        self.assertRollupMatchesRebuild()
+
+    def test_admin_action(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+        response = self.client.post(
+            reverse("admin:backend_expense_changelist"),
+            {
+                "action": "recategorize_selected",
+                "_selected_action": list(self.food.expenses.values_list("pk", flat=True)),
+                "category": self.groceries.pk,
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.groceries.expenses.count(), 6)
+
+
+class StatementImportTests(TestCase):
+    """
+    A bad statement line must reject only itself, and re-imports must skip what is already recorded.
+    """
+
+    STATEMENT = (
+        "date,description,amount,category,notes\n"
+        "2025-01-05,Groceries,-12.50,Food,weekly\n"
+        '2025-01-06,Salary,"1,000.00",,\n'
+        "2025-01-07,Bad,NaN,,\n"
+        "2025-01-08,Bad,sNaN,,\n"
+        "2025-01-09,Bad,-Infinity,,\n"
+        "2025-01-10,Bad,123456789012.00,,\n"
+        "2025-01-11,Bad,abc,,\n"
+        "2025-01-12,Coffee,-3.456,Food,\n"
+    )
+
+    def import_statement(self, content, name="statement.csv"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse("backend:statement_import"),
+                {"statement": SimpleUploadedFile(name, content.encode()), "create_missing": "on"},
+            )
+
+    def test_rejects_invalid_amounts_per_row(self):
+        response = self.import_statement(self.STATEMENT)
+        report = response.context["report"]
+        self.assertEqual((report.expenses_created, report.incomes_created), (2, 1))
+        self.assertEqual([line_number for line_number, _ in report.errors], [4, 5, 6, 7, 8])
+        self.assertContains(response, "Invalid amount: &#x27;NaN&#x27;")
+        self.assertContains(response, "Amount out of range: &#x27;123456789012.00&#x27;")
+        self.assertEqual(
+            list(Expense.objects.order_by("date").values_list("description", "amount", "category__name")),
+            [("Groceries", Decimal("12.50"), "Food"), ("Coffee", Decimal("3.46"), "Food")],
+        )
+        self.assertEqual(get_rollup_total(Income), Decimal("1000.00"))
+
+        report = self.import_statement(self.STATEMENT).context["report"]
+        self.assertEqual((report.created, report.duplicates_skipped), (0, 3))
+        self.assertEqual(Expense.objects.count(), 2)
+
+    def test_byte_order_mark(self):
+        statement = "\ufeffdate,description,amount\n2025-01-05,Groceries,-12.50\n"
+        report = self.import_statement(statement).context["report"]
+        self.assertEqual((report.expenses_created, report.errors), (1, []))
+
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", encoding="utf-8") as statement_file:
+            statement_file.write(statement.replace("Groceries", "Bakery"))
+            statement_file.flush()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("import_statement", statement_file.name, stdout=StringIO())
+        self.assertEqual(Expense.objects.count(), 2)
+
+    def test_ofx(self):
+        statement = (
+            "<OFX><CURDEF>EUR\n"
+            "<STMTTRN><TRNAMT>-42.10<DTPOSTED>20250301120000<NAME>Train<MEMO>ticket</STMTTRN>\n"
+            "<STMTTRN><TRNAMT>NaN<DTPOSTED>20250302<NAME>Bad</STMTTRN>\n"
+            "</OFX>\n"
+        )
+        report = self.import_statement(statement, name="statement.ofx").context["report"]
+        self.assertEqual(report.errors, [(3, "Invalid amount: 'NaN'")])
+        expense = Expense.objects.get()
+        self.assertEqual(
+            (expense.description, expense.amount, expense.currency, expense.notes, expense.date),
+            ("Train", Decimal("42.10"), "EUR", "ticket", datetime.date(2025, 3, 1)),
+        )
+
+
+class ExportTests(TestCase):
+    """
+    Exports must stream every matching row, oldest first, in the documented columns.
+    """
+
+    def setUp(self):
+        food = Category.objects.create(name="Food")
+        card = PaymentMethod.objects.create(name="Card")
+        Expense.objects.create(
+            description="Lunch", amount=20, date=datetime.date(2025, 2, 1), category=food, payment_method=card
+        )
+        Expense.objects.create(description="Rent", amount=900, date=datetime.date(2025, 1, 1))
+        Expense.objects.create(description="Lunch again", amount=15, date=datetime.date(2025, 3, 1), category=food)
+
+    def export(self, file_format, **filters):
+        response = self.client.get(reverse("backend:expense_export", args=[file_format]), filters)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv(self):
+        header, *rows = csv.reader(StringIO(self.export("csv")))
+        self.assertEqual(
+            header,
+            [
+                "id",
+                "date",
+                "description",
+                "amount",
+                "currency",
+                "category",
+                "payment_method",
+                "notes",
+                "created_at",
+                "updated_at",
+            ],
+        )
+        self.assertEqual(
+            [row[1:7] for row in rows],
+            [
+                ["2025-01-01", "Rent", "900.00", "USD", "", ""],
+                ["2025-02-01", "Lunch", "20.00", "USD", "Food", "Card"],
+                ["2025-03-01", "Lunch again", "15.00", "USD", "Food", ""],
+            ],
+        )
+
+    def test_jsonl_with_filters(self):
+        food = Category.objects.get(name="Food")
+        lines = self.export("jsonl", category=food.pk, date_to="2025-02-28").splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual(
+            (row["description"], row["amount"], row["category"], row["payment_method"]),
+            ("Lunch", "20.00", "Food", "Card"),
+        )
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse("backend:expense_export", args=["xml"]))
+        self.assertEqual(response.status_code, 404)
+
+
+class SyntheticLedgerTests(TestCase):
+    """
+    Generated ledgers must be fingerprinted batch by batch and consistent with their rollup.
+    """
+
+    def test_generate_ledger(self):
+        call_command("generate_ledger", expenses=120, incomes=30, batch_size=25, seed=1, stdout=StringIO())
+        self.assertEqual(Expense.objects.count() + Income.objects.count(), 150)
+        self.assertFalse(Expense.objects.filter(fingerprint__isnull=True).exists())
+        self.assertEqual(get_rollup_total(Expense), Expense.objects.aggregate(total=Sum("amount"))["total"])
+
+        # Re-generating the same ledger finds every row in the table, whichever batch it was in.
+        call_command("generate_ledger", expenses=120, incomes=30, batch_size=40, seed=1, stdout=StringIO())
+        self.assertEqual(Expense.objects.count() + Income.objects.count(), 150)
+
+    def test_benchmarks_need_more_than_one_page(self):
+        for day in range(1, 11):
+            Expense.objects.create(description="Coffee", amount=day, date=datetime.date(2025, 1, day))
+        with self.assertRaisesMessage(CommandError, "at least 11 are needed"):
+            call_command("run_benchmarks", stdout=StringIO())
+
+
+class ForecastTests(TestCase):
+    """
+    Forecasts must smooth deseasonalized history and bring back the season of the month being forecast.
+    """
+
+    @staticmethod
+    def series(start, amounts, category=1):
+        start_month = start.year * 12 + start.month - 1
+        return np.array([(start_month + offset, category, amount) for offset, amount in enumerate(amounts)], float)
+
+    def test_holt_forecast(self):
+        self.assertEqual(holt_forecast(np.array([[1.0, 2, 3, 4, 5]]), alpha=1, beta=1).tolist(), [6.0])
+        self.assertEqual(holt_forecast(np.array([[50.0] * 6, [0.0] * 6])).tolist(), [50.0, 0.0])
+        self.assertEqual(holt_forecast(np.array([[9.0, 5, 1]]), alpha=1, beta=1).tolist(), [0.0])
+
+    def test_seasonal_indices(self):
+        december_heavy = [300.0 if month % 12 == 11 else 100.0 for month in range(24)]
+        indices = seasonal_indices(np.array([december_heavy]), first_month=0)
+        np.testing.assert_allclose(indices[0], [100 / (1400 / 12)] * 11 + [300 / (1400 / 12)])
+        np.testing.assert_array_equal(seasonal_indices(np.array([december_heavy[:23]]), 0), np.ones((1, 12)))
+
+    def test_forecast_series_aligns_history_with_calendar_months(self):
+        # History from March: its columns are not aligned with calendar months.
+        start = datetime.date(2022, 3, 1)
+        amounts = [300.0 if (start.month - 1 + offset) % 12 == 11 else 100.0 for offset in range(33)]
+        data = self.series(start, amounts)
+        for today, expected in ((datetime.date(2024, 12, 15), 300.0), (datetime.date(2024, 12, 1), 300.0)):
+            category_ids, forecast = forecast_series(data, today)
+            self.assertEqual(category_ids.tolist(), [1])
+            self.assertAlmostEqual(float(forecast.forecast[0]), expected)
+        _, forecast = forecast_series(self.series(start, amounts[:32] + [40.0]), datetime.date(2024, 11, 20))
+        self.assertAlmostEqual(float(forecast.forecast[0]), 100.0)
+        self.assertAlmostEqual(float(forecast.month_to_date[0]), 40.0)
+        self.assertAlmostEqual(float(forecast.run_rate[0]), 60.0)
+        self.assertAlmostEqual(float(forecast.remaining[0]), 60.0)
+
+    def test_monthly_totals_come_from_the_rollup(self):
+        ExchangeRate.objects.create(currency="EUR", month=datetime.date(2025, 1, 1), rate=Decimal("2.00"))
+        food = Category.objects.create(name="Food")
+        for amount, currency, day in ((10, "USD", 3), (5, "EUR", 4), (7, "USD", 20)):
+            Expense.objects.create(
+                description="Shop", amount=amount, currency=currency, category=food, date=datetime.date(2025, 1, day)
+            )
+        Expense.objects.create(description="Rent", amount=900, date=datetime.date(2025, 2, 1))
+        Income.objects.create(description="Salary", amount=1000, category=food, date=datetime.date(2025, 2, 1))
+        totals = sorted(map(tuple, load_monthly_totals(Expense).tolist()))
+        # One row per month, category and currency, whatever the number of transactions.
+        self.assertEqual(totals, [(24300.0, food.pk, 10.0), (24300.0, food.pk, 17.0), (24301.0, 0.0, 900.0)])
+
+        with self.assertNumQueries(5):
+            forecast = build_forecast(datetime.date(2025, 2, 14))
+        self.assertEqual(
+            [(row["category"], row["month_to_date"], row["forecast"]) for row in forecast.categories],
+            [("Food", 0.0, 27.0), ("Uncategorized", 900.0, 0.0)],
+        )
+
+    def test_forecast_endpoint_is_cached(self):
+        cache.clear()
+        Expense.objects.create(description="Rent", amount=900, date=timezone.localdate().replace(day=1))
+        forecast = self.client.get(reverse("backend:forecast")).json()
+        self.assertGreaterEqual(forecast["expected_expense"], 900.0)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse("backend:forecast")).json(), forecast)
+
+
+class AsyncViewTests(TestCase):
+    """
+    The async dashboard and lists must render what their sync counterparts do, without touching the ORM on the
+    event loop.
+    """
+
+    def setUp(self):
+        cache.clear()
+        rate_cache.clear()
+        ExchangeRate.objects.create(currency="EUR", month=datetime.date(2025, 1, 1), rate=Decimal("1.10"))
+        Income.objects.create(description="Salary", amount=1000, date=datetime.date(2025, 1, 1))
+        Expense.objects.create(description="Books", amount=50, currency="EUR", date=datetime.date(2025, 1, 5))
+        Expense.objects.create(description="Rent", amount=400, date=datetime.date(2025, 1, 6))
+
+    async def get(self, view, path):
+        response = await view(AsyncRequestFactory().get(path))
+        # What the async handler does with a `TemplateResponse`.
+        await sync_to_async(response.render)()
+        return response
+
+    async def test_ahome(self):
+        response = await self.get(views.ahome, "/")
+        sync_response = await sync_to_async(self.client.get)(reverse("backend:home"))
+        for text in ("Books", "Rent", "€50.00", "Total Expense: $455.00"):
+            self.assertContains(response, text)
+            self.assertContains(sync_response, text)
+
+    async def test_async_list(self):
+        response = await self.get(views.AsyncExpenseListView.as_view(), "/")
+        self.assertEqual(
+            [(expense.description, expense.running_balance) for expense in response.context_data["expenses"]],
+            [("Rent", Decimal("545.00")), ("Books", Decimal("945.00"))],
+        )
+        self.assertContains(response, "€50.00 ≈ $55.00")
+        response = await self.get(views.AsyncExpenseListView.as_view(), "/?page=1")
+        self.assertEqual(response.context_data["paginator"].count, 2)
+
+
+@override_settings(PERFORMANCE_INSTRUMENTATION=True)
+class PerformanceMiddlewareTests(TestCase):
+    """
+    The instrumentation must count the queries of sync and async views alike.
+    """
+
+    def assertQueriesCounted(self, response, logs):
+        record = json.loads(logs.records[0].getMessage())
+        self.assertGreater(record["db_queries"], 0)
+        self.assertIn(f'desc="{record["db_queries"]} queries"', response.headers["Server-Timing"])
+
+    def test_sync_view(self):
+        with self.assertLogs("backend.performance", "INFO") as logs:
+            response = self.client.get(reverse("backend:category_list"))
+        self.assertQueriesCounted(response, logs)
+
+    async def test_async_view(self):
+        self.assertTrue(iscoroutinefunction(PerformanceMiddleware(views.budget_status)))
+        with self.assertLogs("backend.performance", "INFO") as logs:
+            response = await self.async_client.get(reverse("backend:budget_status"))
+        self.assertEqual(json.loads(logs.records[0].getMessage())["url_name"], "backend:budget_status")
+        self.assertQueriesCounted(response, logs)
+
+    def test_report_skips_lines_without_the_metric(self):
+        lines = [
+            {"url_name": "backend:home", "total_ms": 10.0, "db_ms": 2.0},
+            {"url_name": "backend:home", "total_ms": 30.0},
+            {"url_name": "backend:home", "total_ms": 20.0, "db_ms": 4.0},
+            {"message": "another logger"},
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".log") as log:
+            log.write("\n".join(json.dumps(line) for line in lines) + "\nnot json\n[1]\n")
+            log.flush()
+            output = StringIO()
+            call_command("performance_report", log.name, metric="db_ms", json=True, stdout=output)
+        report = json.loads(output.getvalue())
+        self.assertEqual(report["urls"], {"backend:home": {"count": 2, "p50": 2.0, "p95": 4.0, "p99": 4.0}})
+        self.assertEqual(report["skipped"], 4)
+
+
+class RecurringRuleTests(TestCase):
+    """
+    Materialization must create every due occurrence once, however often it runs.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rent = RecurringRule.objects.create(
+            description="Rent", amount=900, start_date=datetime.date(2024, 1, 31), frequency="monthly"
+        )
+        cls.salary = RecurringRule.objects.create(
+            transaction_type="income",
+            description="Salary",
+            amount=3000,
+            start_date=datetime.date(2024, 1, 10),
+            frequency="monthly",
+        )
+        cls.gym = RecurringRule.objects.create(
+            description="Gym",
+            amount=15,
+            start_date=datetime.date(2024, 1, 1),
+            end_date=datetime.date(2024, 2, 1),
+            frequency="weekly",
+            interval=2,
+        )
+
+    def test_occurrence_dates(self):
+        self.assertEqual(
+            list(occurrence_dates(self.rent, datetime.date(2024, 1, 1), datetime.date(2024, 4, 30))),
+            [
+                datetime.date(2024, 1, 31),
+                datetime.date(2024, 2, 29),
+                datetime.date(2024, 3, 31),
+                datetime.date(2024, 4, 30),
+            ],
+        )
+        self.assertEqual(
+            list(occurrence_dates(self.gym, datetime.date(2024, 1, 2), datetime.date(2024, 2, 1))),
+            [datetime.date(2024, 1, 15), datetime.date(2024, 1, 29)],
+        )
+
+    def test_materialize_is_idempotent(self):
+        report = materialize_recurring(until=datetime.date(2024, 12, 31))
+        self.assertEqual((report.expenses_created, report.incomes_created), (12 + 3, 12))
+        self.assertEqual(Expense.objects.filter(description="Rent").last().date, datetime.date(2024, 1, 31))
+        self.assertEqual(get_rollup_total(Income), Decimal(36000))
+
+        report = materialize_recurring(until=datetime.date(2024, 12, 31))
+        self.assertEqual((report.rules, report.expenses_created, report.incomes_created), (0, 0, 0))
+
+        report = materialize_recurring(until=datetime.date(2025, 2, 28))
+        self.assertEqual((report.expenses_created, report.incomes_created), (2, 2))
+        self.assertEqual(Expense.objects.filter(description="Rent").count(), 14)
+
+    def test_lost_progress_does_not_duplicate(self):
+        materialize_recurring(until=datetime.date(2024, 6, 30))
+        RecurringRule.objects.update(materialized_through=None)
+        report = materialize_recurring(until=datetime.date(2024, 6, 30))
+        self.assertEqual(report.expenses_created + report.incomes_created, 0)
+        self.assertEqual(report.duplicates_skipped, 6 + 6 + 3)
+
+
+@override_settings(BASE_CURRENCY="USD")
+class CurrencyTests(TestCase):
+    """
+    Totals, checkpoints and reports must convert every amount at its month's rate, inside the database.
+    """
+
+    def setUp(self):
+        rate_cache.clear()
+        ExchangeRate.objects.create(currency="EUR", month=datetime.date(2025, 1, 1), rate=Decimal("1.10"))
+        ExchangeRate.objects.create(currency="EUR", month=datetime.date(2025, 3, 1), rate=Decimal("1.20"))
+        Income.objects.create(description="Salary", amount=1000, date=datetime.date(2025, 1, 1))
+        for amount, currency, date in (
+            (100, "USD", datetime.date(2025, 1, 10)),
+            (100, "EUR", datetime.date(2025, 2, 10)),  # January's rate: 110.00
+            (50, "EUR", datetime.date(2025, 3, 10)),  # 60.00
+            (10, "EUR", datetime.date(2024, 12, 10)),  # Before the first rate, so at it: 11.00
+            (20, "GBP", datetime.date(2025, 3, 11)),  # No rate: left out
+        ):
+            Expense.objects.create(description="Shop", amount=amount, currency=currency, date=date)
+
+    def snapshots(self):
+        return list(BalanceSnapshot.objects.order_by("month").values_list("month", "balance"))
+
+    def test_totals_and_reports(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_rollup_total(Expense), Decimal("281.00"))
+        self.assertEqual(currencies_without_rates(), ["GBP"])
+        self.assertEqual(
+            [(row["period"], row["total"]) for row in build_report(Expense)],
+            [
+                ("2024-12-01", Decimal("11.00")),
+                ("2025-01-01", Decimal("100.00")),
+                ("2025-02-01", Decimal("110.00")),
+                ("2025-03-01", Decimal("60.00")),
+            ],
+        )
+
+    def test_checkpoints_and_running_balances(self):
+        incremental = self.snapshots()
+        rebuild_rollup()
+        self.assertEqual(incremental, self.snapshots())
+        self.assertEqual(BalanceSnapshot.objects.get(month=datetime.date(2025, 3, 1)).balance, Decimal("719.00"))
+
+        expenses = list(Expense.objects.filter(date__gte=datetime.date(2025, 3, 1)))
+        attach_running_balances(expenses)
+        self.assertEqual([expense.running_balance for expense in expenses], [Decimal("719.00")] * 2)
+        self.assertEqual(get_balance_at(datetime.date(2025, 2, 28)), Decimal("779.00"))
+
+    def test_load_exchange_rates(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as rates:
+            rates.write("\ufeffcurrency,date,rate\neur,2025-03-15,1.25\nGBP,2025-01-01,1.30\n")
+            rates.flush()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("load_exchange_rates", rates.name, stdout=StringIO())
+        self.assertEqual(get_rollup_total(Expense), Decimal("309.50"))
+        self.assertEqual(BalanceSnapshot.objects.get(month=datetime.date(2025, 3, 1)).balance, Decimal("690.50"))
+
+        response = self.client.get(reverse("backend:expense_list"))
+        self.assertContains(response, "€50.00 ≈ $62.50")
+        self.assertContains(response, "£20.00 ≈ $26.00")
+        self.assertContains(response, "-$11.00")
+
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as rates:
+            rates.write("currency,date,rate\nEUR,2025-04-01,1.30\nEUR,2025-05-01,abc\n")
+            rates.flush()
+            with self.assertRaises(CommandError):
+                call_command("load_exchange_rates", rates.name, stdout=StringIO())
+        self.assertFalse(ExchangeRate.objects.filter(month=datetime.date(2025, 4, 1)).exists())
+
+
+class SearchTests(TestCase):
+    """
+    Full-text search must follow saves and deletes and rank closer matches first.
+    """
+
+    def setUp(self):
+        self.coffee = Expense.objects.create(description="Coffee beans", amount=12, notes="coffee for the office")
+        self.lunch = Expense.objects.create(description="Lunch", amount=20, notes="with coffee")
+        Income.objects.create(description="Coffee shop refund", amount=3)
+
+    def test_search_follows_saves_and_deletes(self):
+        self.assertCountEqual(search_filter(Expense.objects.all(), "coffee"), [self.coffee, self.lunch])
+        self.lunch.notes = "with tea"
+        self.lunch.save()
+        self.assertCountEqual(search_filter(Expense.objects.all(), "coffee"), [self.coffee])
+        self.coffee.delete()
+        self.assertFalse(search_filter(Expense.objects.all(), "coffee").exists())
+
+    def test_search_endpoint_ranks_results(self):
+        response = self.client.get(reverse("backend:search"), {"q": "coffee", "type": "expense"})
+        self.assertEqual([result["id"] for result in response.json()["results"]], [self.coffee.pk, self.lunch.pk])
+
+    def test_list_filter(self):
+        response = self.client.get(reverse("backend:expense_list"), {"q": "lunch"})
+        self.assertEqual(list(response.context["expenses"]), [self.lunch])
+
+
+@override_settings(REPLICA_DATABASES=["replica"])
+class ReplicaRoutingTests(TestCase):
+    """
+    Only reads of opted-in views go to replicas, and never right after the client has written.
+    """
+
+    def test_router(self):
+        self.assertEqual(router.db_for_read(Expense), "default")
+        with read_from_replicas():
+            self.assertEqual(router.db_for_read(Expense), "replica")
+            self.assertEqual(router.db_for_write(Expense), "default")
+        self.assertFalse(router.allow_migrate("replica", "backend"))
+
+    @override_settings(REPLICA_DATABASES=["replica_1", "replica_2", "replica_3"])
+    def test_one_replica_per_request(self):
+        view = replica_reads(lambda request: {router.db_for_read(Expense) for _ in range(20)})
+        for _ in range(5):
+            (database,) = view(RequestFactory().get("/"))
+            self.assertIn(database, ["replica_1", "replica_2", "replica_3"])
+        with read_from_replicas():
+            database = router.db_for_read(Expense)
+            with read_from_replicas():
+                self.assertEqual(router.db_for_read(Income), database)
+            with read_from_replicas(False):
+                self.assertEqual(router.db_for_read(Income), "default")
+
+    def test_sqlite_replica(self):
+        self.addCleanup(importlib.reload, project_settings)
+        with mock.patch.dict("os.environ", BUDGET_DB_ENGINE="sqlite", BUDGET_SQLITE_REPLICA_PATH="replica.sqlite3"):
+            importlib.reload(project_settings)
+        self.assertEqual(project_settings.REPLICA_DATABASES, ["replica_sqlite"])
+        replica = project_settings.DATABASES["replica_sqlite"]
+        self.assertEqual((replica["ENGINE"], replica["NAME"]), ("django.db.backends.sqlite3", "replica.sqlite3"))
+        self.assertEqual(replica["TEST"], {"MIRROR": "default"})
+        with override_settings(REPLICA_DATABASES=project_settings.REPLICA_DATABASES), read_from_replicas():
+            self.assertEqual(router.db_for_read(Expense), "replica_sqlite")
+
+        with mock.patch.dict("os.environ", BUDGET_DB_ENGINE="", BUDGET_SQLITE_REPLICA_PATH="replica.sqlite3"):
+            with self.assertRaises(ImproperlyConfigured):
+                importlib.reload(project_settings)
+
+    def test_replica_reads_unless_pinned_to_primary(self):
+        request = RequestFactory().get("/")
+        view = replica_reads(lambda request: router.db_for_read(Expense))
+        self.assertEqual(view(request), "replica")
+        request.read_from_primary = True
+        self.assertEqual(view(request), "default")
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response = self.client.post(reverse("backend:category_create"), {"name": "Rent"})
+        self.assertIn(PRIMARY_STICKY_COOKIE, response.cookies)
+        response = self.client.get(reverse("backend:category_list"))
+        self.assertTrue(response.wsgi_request.read_from_primary)
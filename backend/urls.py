@@ -1,22 +1,40 @@
+from django.conf import settings
 from django.urls import path
 
 from backend import views
 
 urlpatterns = [
-    path("", views.home, name="home"),
+    path("", views.ahome if settings.ASYNC_VIEWS else views.home, name="home"),
     path("categories/", views.category_list, name="category_list"),
     path("categories/new/", views.category_create, name="category_create"),
     path("categories/<int:pk>/", views.category_detail, name="category_detail"),
     path("categories/<int:pk>/edit/", views.category_update, name="category_update"),
     path("categories/<int:pk>/delete/", views.category_delete, name="category_delete"),
-    path("expenses/", views.ExpenseListView.as_view(), name="expense_list"),
+    path(
+        "expenses/",
+        (views.AsyncExpenseListView if settings.ASYNC_VIEWS else views.ExpenseListView).as_view(),
+        name="expense_list",
+    ),
     path("expenses/new/", views.ExpenseCreateView.as_view(), name="expense_create"),
     path("expenses/<int:pk>/", views.ExpenseDetailView.as_view(), name="expense_detail"),
     path("expenses/<int:pk>/edit/", views.ExpenseUpdateView.as_view(), name="expense_update"),
     path("expenses/<int:pk>/delete/", views.ExpenseDeleteView.as_view(), name="expense_delete"),
-    path("incomes/", views.IncomeListView.as_view(), name="income_list"),
+    path("expenses/export/<str:file_format>/", views.expense_export, name="expense_export"),
+    path(
+        "incomes/",
+        (views.AsyncIncomeListView if settings.ASYNC_VIEWS else views.IncomeListView).as_view(),
+        name="income_list",
+    ),
     path("incomes/new/", views.IncomeCreateView.as_view(), name="income_create"),
+    path("incomes/export/<str:file_format>/", views.income_export, name="income_export"),
     # TODO add detail, update, delete URLs for Income as well
+    path("reports/spending/", views.spending_report, name="spending_report"),
+    path("reports/income/", views.income_report, name="income_report"),
+    path("search/", views.search, name="search"),
+    path("balance/", views.balance_history, name="balance_history"),
+    path("budgets/", views.budget_status, name="budget_status"),
+    path("forecast/", views.forecast, name="forecast"),
+    path("import/", views.statement_import, name="statement_import"),
     path("payment-methods/", views.PaymentMethodListView.as_view(), name="paymentmethod_list"),
     path("payment-methods/new/", views.PaymentMethodCreateView.as_view(), name="paymentmethod_create"),
 ]
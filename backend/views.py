@@ -1,53 +1,100 @@
 # backend/views.py
-from django.http import HttpRequest
+import io
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpRequest, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.http import HttpResponse
+from django.utils import timezone
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.response import TemplateResponse
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 
-from .budget_utilities.cashflow import get_most_recent_transactions, get_total_of_transaction_type
+from .budget_utilities.balance import aattach_running_balances, aget_balance_history, attach_running_balances
+from .budget_utilities.budgets import aget_budget_statuses
+from .budget_utilities.caching import (
+    aget_cached_dashboard,
+    aget_cached_forecast,
+    get_cached_dashboard,
+    get_cached_forecast,
+)
+from .budget_utilities.cashflow import get_category_monthly_breakdown, get_category_totals
 from .budget_utilities.date_time import get_current_month
+from .budget_utilities.freshness import ConditionalOnLedgerMixin, conditional_on_ledger
+from .budget_utilities.export import EXPORT_FORMATS, filter_transactions, get_export_columns
+from .budget_utilities.importing import detect_statement_format, import_statement
+from .budget_utilities.reporting import abuild_report
+from .budget_utilities.search import search_filter, search_transactions
+from .budget_utilities.pagination import KeysetPaginationMixin, apaginate_keyset_request, paginate_keyset_request
 from .models import Category, PaymentMethod, Expense, Income
-from .forms import CategoryForm, PaymentMethodForm, ExpenseForm, IncomeForm
+from .routers import ReplicaReadsMixin, replica_reads
+from .forms import (
+    CategoryForm,
+    DateRangeForm,
+    PaymentMethodForm,
+    ExpenseForm,
+    IncomeForm,
+    ReportForm,
+    SearchForm,
+    StatementImportForm,
+    TransactionFilterForm,
+)
 
 _DEFAULT_PAGINATION = 10
 
 
+@replica_reads
+@conditional_on_ledger(per_day=True)
 def home(request: HttpRequest) -> HttpResponse:
     """
     A simple dashboard showing recent transactions and summaries.
     """
-    recent_expenses = get_most_recent_transactions(Expense)
-    recent_incomes = get_most_recent_transactions(Income)
+    context = {
+        **get_cached_dashboard(getattr(request, "ledger_version", None)),
+        "forecast": get_cached_forecast(),
+        "current_month": get_current_month(),
+    }
+    return render(request, "backend/home.html", context)
 
-    total_expense = get_total_of_transaction_type(Expense)
-    total_income = get_total_of_transaction_type(Income)
-    net_balance = total_income - total_expense
 
+@replica_reads
+@conditional_on_ledger(per_day=True)
+async def ahome(request: HttpRequest) -> HttpResponse:
+    """
+    `home` for ASGI deployments (`ASYNC_VIEWS`). The template is rendered by the handler in a thread, as it may
+    still read exchange rates.
+    """
     context = {
-        "recent_expenses": recent_expenses,
-        "recent_incomes": recent_incomes,
-        "total_expense": total_expense,
-        "total_income": total_income,
-        "net_balance": net_balance,
+        **await aget_cached_dashboard(getattr(request, "ledger_version", None)),
+        "forecast": await aget_cached_forecast(),
         "current_month": get_current_month(),
     }
-    return render(request, "backend/home.html", context)
+    return TemplateResponse(request, "backend/home.html", context)
 
 
+@replica_reads
+@conditional_on_ledger
 def category_list(request: HttpRequest) -> HttpResponse:
     categories = Category.objects.all()
     return render(request, "backend/category/category_list.html", {"categories": categories})
 
 
+@replica_reads
+@conditional_on_ledger
 def category_detail(request: HttpRequest, pk: int) -> HttpResponse:
     category = get_object_or_404(Category, pk=pk)
-    category_expenses = category.expenses.all()
-    category_incomes = category.incomes.all()
+    expense_page = paginate_keyset_request(request, category.expenses.all(), _DEFAULT_PAGINATION, prefix="expenses_")
+    income_page = paginate_keyset_request(request, category.incomes.all(), _DEFAULT_PAGINATION, prefix="incomes_")
     return render(
         request,
         "backend/category/category_detail.html",
-        {"category": category, "expenses": category_expenses, "incomes": category_incomes},
+        {
+            "category": category,
+            "expenses": expense_page,
+            "incomes": income_page,
+            "totals": get_category_totals(category),
+            "monthly_breakdown": get_category_monthly_breakdown(category),
+        },
     )
 
 
@@ -82,15 +129,71 @@ def category_delete(request: HttpRequest, pk: int) -> HttpResponse:
     return render(request, "backend/confirm_delete.html", {"object": category, "type": Category.__name__})
 
 
-class ExpenseListView(ListView):
+class RunningBalanceMixin:
+    """
+    `ListView` mixin setting `running_balance` on every listed transaction.
+    """
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        attach_running_balances(list(context["object_list"]))
+        return context
+
+
+class SearchFilterMixin:
+    """
+    `ListView` mixin narrowing the listed transactions to the full-text matches of `?q=`.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        terms = self.request.GET.get("q", "").strip()
+        return search_filter(queryset, terms) if terms else queryset
+
+
+class AsyncTransactionListMixin:
+    """
+    Serves the keyset pages of a transaction `ListView` asynchronously: the page and its running balances are loaded
+    with the async ORM, and the `TemplateResponse` is rendered by the handler in a thread. Legacy `?page=` requests
+    run the synchronous view in a thread.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        if self.page_kwarg in request.GET:
+            return await sync_to_async(super().get)(request, *args, **kwargs)
+        page = await apaginate_keyset_request(request, self.get_queryset(), self.get_paginate_by(None))
+        await aattach_running_balances(page.object_list)
+        self.object_list = page.object_list
+        context = {
+            "view": self,
+            "paginator": None,
+            "page_obj": page,
+            "is_paginated": page.has_other_pages(),
+            "object_list": page.object_list,
+            self.context_object_name: page.object_list,
+        }
+        return self.render_to_response(context)
+
+
+class ExpenseListView(
+    ReplicaReadsMixin, ConditionalOnLedgerMixin, SearchFilterMixin, RunningBalanceMixin, KeysetPaginationMixin, ListView
+):
     model = Expense
+    queryset = Expense.objects.with_related()
     template_name = "backend/expense/expense_list.html"
     context_object_name = "expenses"
     paginate_by = _DEFAULT_PAGINATION
 
 
-class ExpenseDetailView(DetailView):
+class AsyncExpenseListView(AsyncTransactionListMixin, ExpenseListView):
+    """
+    `ExpenseListView` for ASGI deployments (`ASYNC_VIEWS`).
+    """
+
+
+class ExpenseDetailView(ReplicaReadsMixin, ConditionalOnLedgerMixin, DetailView):
     model = Expense
+    queryset = Expense.objects.with_related()
     template_name = "backend/expense/expense_detail.html"
     context_object_name = "expense"
 
@@ -131,13 +234,22 @@ class ExpenseDeleteView(DeleteView):
         return context
 
 
-class IncomeListView(ListView):
+class IncomeListView(
+    ReplicaReadsMixin, ConditionalOnLedgerMixin, SearchFilterMixin, RunningBalanceMixin, KeysetPaginationMixin, ListView
+):
     model = Income
+    queryset = Income.objects.with_related()
     template_name = "backend/income_list.html"
     context_object_name = "incomes"
     paginate_by = _DEFAULT_PAGINATION
 
 
+class AsyncIncomeListView(AsyncTransactionListMixin, IncomeListView):
+    """
+    `IncomeListView` for ASGI deployments (`ASYNC_VIEWS`).
+    """
+
+
 class IncomeCreateView(CreateView):
     model = Income
     form_class = IncomeForm
@@ -153,7 +265,7 @@ class IncomeCreateView(CreateView):
 # .TODO IncomeDetailView, IncomeUpdateView, IncomeDeleteView ...
 
 
-class PaymentMethodListView(ListView):
+class PaymentMethodListView(ReplicaReadsMixin, ConditionalOnLedgerMixin, ListView):
     model = PaymentMethod
     template_name = "backend/paymentmethod_list.html"
     context_object_name = "payment_methods"
@@ -169,3 +281,160 @@ class PaymentMethodCreateView(CreateView):
         context = super().get_context_data(**kwargs)
         context["form_title"] = "Add Payment Method"
         return context
+
+
+def _export_transactions(request: HttpRequest, transaction_type: type[Expense | Income], file_format: str):
+    if file_format not in EXPORT_FORMATS:
+        raise Http404(f"Unsupported export format: {file_format}")
+    form = TransactionFilterForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_json(), content_type="application/json")
+
+    queryset = filter_transactions(transaction_type.objects.all(), form.cleaned_data)
+    # The rows are streamed after the view returns, so pin the database chosen for this request now.
+    queryset = queryset.using(queryset.db)
+    serialize, content_type = EXPORT_FORMATS[file_format]
+    filename = f"{transaction_type._meta.verbose_name_plural}-{timezone.localdate():%Y%m%d}.{file_format}"
+    return StreamingHttpResponse(
+        serialize(queryset, get_export_columns(transaction_type)),
+        content_type=content_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@replica_reads
+def expense_export(request: HttpRequest, file_format: str) -> StreamingHttpResponse:
+    """
+    Stream all expenses matching the date/category/payment method filters as CSV or JSON Lines.
+    """
+    return _export_transactions(request, Expense, file_format)
+
+
+@replica_reads
+def income_export(request: HttpRequest, file_format: str) -> StreamingHttpResponse:
+    """
+    Stream all incomes matching the date/category/source filters as CSV or JSON Lines.
+    """
+    return _export_transactions(request, Income, file_format)
+
+
+_MAX_REPORTED_IMPORT_ERRORS = 100
+
+
+def statement_import(request: HttpRequest) -> HttpResponse:
+    """
+    Upload a CSV/OFX bank statement and import it in batches, reporting the rejected rows.
+    """
+    report = None
+    if request.method == "POST":
+        form = StatementImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            statement = form.cleaned_data["statement"]
+            stream = io.TextIOWrapper(statement.file, encoding="utf-8-sig", errors="replace", newline="")
+            report = import_statement(
+                stream,
+                statement_format=detect_statement_format(statement.name),
+                create_missing=form.cleaned_data["create_missing"],
+            )
+    else:
+        form = StatementImportForm()
+    return render(
+        request,
+        "backend/statement_import.html",
+        {
+            "form": form,
+            "report": report,
+            "errors": report.errors[:_MAX_REPORTED_IMPORT_ERRORS] if report else [],
+        },
+    )
+
+
+async def _transaction_report(request: HttpRequest, transaction_type: type[Expense | Income]) -> JsonResponse:
+    form = ReportForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    period = form.cleaned_data["period"] or "month"
+    group_by = form.cleaned_data["group_by"]
+    try:
+        rows = await abuild_report(transaction_type, period=period, group_by=group_by, filters=form.cleaned_data)
+    except ValueError as error:
+        return JsonResponse({"errors": {"group_by": [str(error)]}}, status=400)
+    return JsonResponse({"period": period, "group_by": group_by or None, "rows": rows})
+
+
+@replica_reads
+async def spending_report(request: HttpRequest) -> JsonResponse:
+    """
+    Expenses per day/week/month/year, optionally grouped by category or payment method.
+    """
+    return await _transaction_report(request, Expense)
+
+
+@replica_reads
+async def income_report(request: HttpRequest) -> JsonResponse:
+    """
+    Incomes per day/week/month/year, optionally grouped by category or source.
+    """
+    return await _transaction_report(request, Income)
+
+
+@replica_reads
+async def forecast(request: HttpRequest) -> JsonResponse:
+    """
+    Projected month-end balance and per-category run-rates and forecasts for the current month.
+    """
+    return JsonResponse(await aget_cached_forecast())
+
+
+@replica_reads
+async def budget_status(request: HttpRequest) -> JsonResponse:
+    """
+    Spent, remaining and over-budget state of every budget in its current month, quarter or year.
+    """
+    return JsonResponse({"budgets": [status.as_dict() for status in await aget_budget_statuses()]})
+
+
+@replica_reads
+async def balance_history(request: HttpRequest) -> JsonResponse:
+    """
+    Month-end balances between the optional `date_from`/`date_to`, for a balance-over-time chart.
+    """
+    form = DateRangeForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    return JsonResponse(
+        {"points": await aget_balance_history(form.cleaned_data["date_from"], form.cleaned_data["date_to"])}
+    )
+
+
+@replica_reads
+def search(request: HttpRequest) -> JsonResponse:
+    """
+    Full-text search over the descriptions and notes of expenses and incomes, best matches first.
+    """
+    form = SearchForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    terms, selected_type = form.cleaned_data["q"], form.cleaned_data["type"]
+    results = []
+    for transaction_type in (Expense, Income):
+        if selected_type and selected_type != transaction_type._meta.model_name:
+            continue
+        counterparty_field = transaction_type.counterparty_field
+        results += [
+            {
+                "type": transaction_type._meta.model_name,
+                "id": item.pk,
+                "date": item.date,
+                "description": item.description,
+                "amount": item.amount,
+                "category": item.category.name if item.category else None,
+                counterparty_field: getattr(item, counterparty_field).name
+                if getattr(item, counterparty_field)
+                else None,
+                "rank": round(item.rank, 6),
+            }
+            for item in search_transactions(transaction_type, terms)
+        ]
+    results.sort(key=lambda result: result["rank"], reverse=True)
+    return JsonResponse({"query": terms, "results": results})
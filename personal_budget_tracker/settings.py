@@ -10,12 +10,19 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
+def _env_flag(name: str, default: bool = False) -> bool:
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
@@ -41,11 +48,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "backend.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "backend.middleware.PrimaryStickinessMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -69,6 +78,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "personal_budget_tracker.wsgi.application"
 
+# Serve the dashboard and the transaction lists with their async views. Only worth it under ASGI (uvicorn): under
+# WSGI every async view runs in its own event loop.
+ASYNC_VIEWS = _env_flag("BUDGET_ASYNC_VIEWS")
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -84,6 +97,90 @@ DATABASES = {
     }
 }
 
+# `BUDGET_DB_ENGINE=sqlite` runs against a local SQLite file instead, e.g. to compare benchmarks between backends.
+if os.environ.get("BUDGET_DB_ENGINE") == "sqlite":
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("BUDGET_SQLITE_PATH", str(BASE_DIR / "db.sqlite3")),
+    }
+
+# Connection reuse
+# `BUDGET_DB_CONN_MAX_AGE` keeps a connection open across requests for that many seconds (`none` for unlimited),
+# which suits threaded WSGI workers (gunicorn). Health checks re-validate a reused connection before its first query.
+# `BUDGET_DB_POOL=1` uses Django's native psycopg 3 pool instead (install the `pool` dependency group), which also
+# works under ASGI, where every request runs on a new thread and persistent connections would not be reused.
+_conn_max_age = os.environ.get("BUDGET_DB_CONN_MAX_AGE", "0")
+DATABASES["default"]["CONN_MAX_AGE"] = None if _conn_max_age.lower() == "none" else int(_conn_max_age)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = _env_flag("BUDGET_DB_CONN_HEALTH_CHECKS", default=True)
+if _env_flag("BUDGET_DB_POOL") and DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    # Django rejects persistent connections in combination with a pool.
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("BUDGET_DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("BUDGET_DB_POOL_MAX_SIZE", 10)),
+            "timeout": int(os.environ.get("BUDGET_DB_POOL_TIMEOUT", 10)),
+        }
+    }
+
+# Read replicas
+# Each request of a read-only view (see `backend.routers.replica_reads`) reads from one random replica; writes go
+# to `default`. `BUDGET_REPLICA_HOSTS=host1,host2` adds PostgreSQL replicas sharing the primary's settings.
+REPLICA_DATABASES = []
+for _number, _host in enumerate(filter(None, os.environ.get("BUDGET_REPLICA_HOSTS", "").split(",")), start=1):
+    DATABASES[f"replica_{_number}"] = {**DATABASES["default"], "HOST": _host.strip(), "TEST": {"MIRROR": "default"}}
+    REPLICA_DATABASES.append(f"replica_{_number}")
+# `BUDGET_SQLITE_REPLICA_PATH=replica.sqlite3` adds a copy of the SQLite database as a replica, to try the routing
+# locally. Only valid with `BUDGET_DB_ENGINE=sqlite`.
+if os.environ.get("BUDGET_SQLITE_REPLICA_PATH"):
+    if DATABASES["default"]["ENGINE"] != "django.db.backends.sqlite3":
+        raise ImproperlyConfigured("BUDGET_SQLITE_REPLICA_PATH requires BUDGET_DB_ENGINE=sqlite.")
+    DATABASES["replica_sqlite"] = {
+        **DATABASES["default"],
+        "NAME": os.environ["BUDGET_SQLITE_REPLICA_PATH"],
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append("replica_sqlite")
+
+DATABASE_ROUTERS = ["backend.routers.ReplicaRouter"]
+
+# After a write, the client reads from the primary for this long (seconds) so it sees its own changes.
+REPLICA_STICKY_SECONDS = int(os.environ.get("BUDGET_REPLICA_STICKY_SECONDS", 10))
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory is per process; use `BUDGET_CACHE_BACKEND=file` to share the cache between worker processes.
+
+if os.environ.get("BUDGET_CACHE_BACKEND") == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("BUDGET_CACHE_LOCATION", str(BASE_DIR / ".cache")),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "budget-tracker",
+        }
+    }
+
+# Cached dashboard entries are keyed by the ledger version, which every write bumps, and the date; the timeout
+# bounds staleness after writes that bypass the model signals (e.g. raw SQL) and how long older entries are kept.
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get("BUDGET_DASHBOARD_CACHE_TIMEOUT", 3600))
+
+# Forecasts read every month of the rollup, so they are only refreshed this often (seconds).
+FORECAST_CACHE_TIMEOUT = int(os.environ.get("BUDGET_FORECAST_CACHE_TIMEOUT", 900))
+
+# Exchange rates are copied into every process for rendering converted amounts and re-read this often (seconds).
+EXCHANGE_RATE_CACHE_TIMEOUT = int(os.environ.get("BUDGET_EXCHANGE_RATE_CACHE_TIMEOUT", 3600))
+
+# Currency
+# Totals, balances, budgets and reports are converted to this ISO 4217 currency with the `ExchangeRate` table.
+
+BASE_CURRENCY = os.environ.get("BUDGET_BASE_CURRENCY", "USD").upper()
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -119,8 +216,76 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = "static/"
+STATIC_ROOT = os.environ.get("BUDGET_STATIC_ROOT", str(BASE_DIR / "staticfiles"))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+
+# Per-request performance instrumentation
+# Adds Server-Timing headers and writes one JSON line per request to PERFORMANCE_LOG_FILE,
+# which `manage.py performance_report` aggregates into p50/p95/p99 per URL name.
+
+PERFORMANCE_INSTRUMENTATION = _env_flag("BUDGET_PERFORMANCE_INSTRUMENTATION")
+
+PERFORMANCE_LOG_FILE = os.environ.get("BUDGET_PERFORMANCE_LOG_FILE", str(BASE_DIR / "performance.log"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "message": {"format": "%(message)s"},
+    },
+    "handlers": {
+        "performance_file": {
+            "class": "logging.FileHandler",
+            "filename": PERFORMANCE_LOG_FILE,
+            "formatter": "message",
+            "delay": True,
+        },
+    },
+    "loggers": {
+        "backend.performance": {
+            "handlers": ["performance_file"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
+
+# Deployment profile
+# `BUDGET_ENV=production` turns DEBUG off (so queries are no longer recorded in memory), takes the secret key and
+# hosts from the environment, caches compiled templates without the development autoreloader, compresses and
+# conditionally answers responses, and stores static files under hashed names with pre-compressed copies
+# (run `manage.py collectstatic` on deploy).
+
+BUDGET_ENV = os.environ.get("BUDGET_ENV", "development")
+
+if BUDGET_ENV == "production":
+    DEBUG = False
+    SECRET_KEY = os.environ["BUDGET_SECRET_KEY"]
+    ALLOWED_HOSTS = [host.strip() for host in os.environ.get("BUDGET_ALLOWED_HOSTS", "").split(",") if host.strip()]
+    # Set `BUDGET_SECURE_COOKIES=0` only when the site is not served over HTTPS.
+    SESSION_COOKIE_SECURE = CSRF_COOKIE_SECURE = _env_flag("BUDGET_SECURE_COOKIES", default=True)
+
+    _security_index = MIDDLEWARE.index("django.middleware.security.SecurityMiddleware")
+    MIDDLEWARE[_security_index + 1 : _security_index + 1] = [
+        "django.middleware.gzip.GZipMiddleware",
+        "django.middleware.http.ConditionalGetMiddleware",
+    ]
+
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        (
+            "django.template.loaders.cached.Loader",
+            ["django.template.loaders.filesystem.Loader", "django.template.loaders.app_directories.Loader"],
+        )
+    ]
+
+    STORAGES = {
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "backend.storage.CompressedManifestStaticFilesStorage"},
+    }